@@ -0,0 +1,162 @@
+import argparse
+import time
+
+import numpy as np
+
+from retrieval import select_top_k
+
+# Default recall/latency trade-off: lists probed per query and how many
+# coarse candidates are re-ranked exactly
+ANN_PROBES = 8
+ANN_CANDIDATES = 500
+KMEANS_ITERATIONS = 10
+# Points per list used to train the coarse quantizer
+TRAINING_POINTS_PER_LIST = 64
+ASSIGN_CHUNK = 65536
+
+
+# Top principal directions of vectors, computed on a sample
+def svd_projection(vectors, n_components, sample_size, rng):
+    sample = vectors[rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)]
+    _, _, vt = np.linalg.svd(np.asarray(sample, dtype=np.float32), full_matrices=False)
+    return vt[:n_components].T.astype(np.float32)
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# Spherical k-means: centroids are unit vectors compared by dot product
+def train_centroids(vectors, n_lists, iterations, rng):
+    centroids = vectors[rng.choice(len(vectors), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = np.bincount(assignment, minlength=n_lists) == 0
+        # Reseed empty lists with random points so every list stays in use
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+# Inverted-file (IVF) index over dense L2-normalised vectors. Vectors are
+# projected onto their top SVD directions and clustered with spherical
+# k-means. A query probes the closest lists, ranks their members in the
+# reduced space, then re-ranks the best candidates with the full vectors.
+class IVFIndex:
+    def __init__(self, vectors, n_lists=None, n_components=64, iterations=KMEANS_ITERATIONS, seed=0):
+        rng = np.random.default_rng(seed)
+        self.vectors = vectors
+        n_docs, dim = vectors.shape
+        self.n_lists = n_lists or max(1, int(np.sqrt(n_docs)))
+        self.n_lists = min(self.n_lists, n_docs)
+
+        n_components = min(n_components, dim)
+        training_size = min(n_docs, self.n_lists * TRAINING_POINTS_PER_LIST)
+        self.projection = svd_projection(vectors, n_components, training_size, rng)
+
+        self.reduced = np.empty((n_docs, n_components), dtype=np.float32)
+        for start in range(0, n_docs, ASSIGN_CHUNK):
+            chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK], dtype=np.float32)
+            self.reduced[start:start + ASSIGN_CHUNK] = normalize_rows(chunk @ self.projection)
+
+        sample = self.reduced[rng.choice(n_docs, size=training_size, replace=False)]
+        self.centroids = train_centroids(sample, self.n_lists, iterations, rng)
+
+        assignment = np.empty(n_docs, dtype=np.int32)
+        for start in range(0, n_docs, ASSIGN_CHUNK):
+            assignment[start:start + ASSIGN_CHUNK] = np.argmax(
+                self.reduced[start:start + ASSIGN_CHUNK] @ self.centroids.T, axis=1
+            )
+        # Members of list i are list_members[list_offsets[i]:list_offsets[i + 1]]
+        self.list_members = np.argsort(assignment, kind="stable").astype(np.int64)
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=self.n_lists))])
+
+    # Top-k (doc ids, exact scores) for a query vector among allowed docs
+    def search(self, query_vector, k, probes=ANN_PROBES, candidates=ANN_CANDIDATES, allowed=None):
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        reduced_query = query_vector @ self.projection
+        reduced_query /= np.linalg.norm(reduced_query) or 1.0
+
+        probes = min(probes, self.n_lists)
+        centroid_scores = self.centroids @ reduced_query
+        probed = np.argpartition(-centroid_scores, probes - 1)[:probes]
+
+        members = np.concatenate([
+            self.list_members[self.list_offsets[i]:self.list_offsets[i + 1]] for i in probed
+        ])
+        if allowed is not None:
+            members = members[allowed[members]]
+        if len(members) == 0:
+            return members, np.empty(0, dtype=np.float32)
+
+        # Coarse ranking in the reduced space, then exact re-ranking
+        coarse_scores = self.reduced[members] @ reduced_query
+        shortlist, _ = select_top_k(members, coarse_scores, max(candidates, k))
+        shortlist = np.sort(shortlist)  # Sorted reads are kinder to a memory-mapped matrix
+        exact_scores = np.asarray(self.vectors[shortlist], dtype=np.float32) @ query_vector
+        return select_top_k(shortlist, exact_scores, k)
+
+
+# Synthetic catalog of unit vectors with topic/subtopic structure, shaped
+# like real embeddings whose neighbours share a family of assessments
+def synthetic_vectors(n_docs, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    n_topics = max(8, n_docs // 500)
+    topics = normalize_rows(rng.standard_normal((n_topics, dim)))
+    subtopics = normalize_rows(rng.standard_normal((n_topics * 20, dim)))
+    noise = normalize_rows(rng.standard_normal((n_docs, dim)))
+    vectors = (topics[rng.integers(0, n_topics, n_docs)]
+               + 0.5 * subtopics[rng.integers(0, n_topics * 20, n_docs)]
+               + 0.25 * noise)
+    return normalize_rows(vectors).astype(np.float32)
+
+
+# Recall@k and latency of the IVF index against exact scoring
+def benchmark(n_docs=200000, dim=256, n_queries=200, k=10, probe_settings=(1, 4, 8, 16, 32), candidates=ANN_CANDIDATES):
+    vectors = synthetic_vectors(n_docs, dim)
+    rng = np.random.default_rng(1)
+    noise = normalize_rows(rng.standard_normal((n_queries, dim)))
+    queries = normalize_rows(vectors[rng.integers(0, n_docs, n_queries)] + 0.25 * noise).astype(np.float32)
+
+    started = time.perf_counter()
+    index = IVFIndex(vectors)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    exact = [select_top_k(np.arange(n_docs), vectors @ query, k)[0] for query in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / n_queries
+
+    results = {"n_docs": n_docs, "dim": dim, "n_lists": index.n_lists, "build_seconds": build_seconds,
+               "exact_ms": exact_ms, "settings": []}
+    for probes in probe_settings:
+        started = time.perf_counter()
+        found = [index.search(query, k, probes=probes, candidates=candidates)[0] for query in queries]
+        ann_ms = (time.perf_counter() - started) * 1000 / n_queries
+        recall = np.mean([len(set(a) & set(e)) / k for a, e in zip(found, exact)])
+        results["settings"].append({"probes": probes, "candidates": candidates, "recall": float(recall), "ms": ann_ms})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IVF recall@k against exact scoring on a synthetic catalog")
+    parser.add_argument("--docs", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, default=ANN_CANDIDATES)
+    args = parser.parse_args()
+
+    results = benchmark(args.docs, args.dim, args.queries, args.k, candidates=args.candidates)
+    print(f"{results['n_docs']} docs, {results['n_lists']} lists, built in {results['build_seconds']:.1f}s, "
+          f"exact {results['exact_ms']:.2f} ms/query")
+    for setting in results["settings"]:
+        print(f"probes={setting['probes']:>3} candidates={setting['candidates']}: "
+              f"recall@{args.k}={setting['recall']:.3f} {setting['ms']:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
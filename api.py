@@ -0,0 +1,432 @@
+import hmac
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+
+from batcher import MicroBatcher, Overloaded
+from diversity import DIVERSITY
+from jd_fetcher import get_fetcher
+from metrics import (
+    CONTENT_TYPE,
+    REQUEST_SECONDS,
+    Callback,
+    extend_profile,
+    registry,
+    server_timing,
+    stage,
+    start_profile
+)
+from recommender import (
+    CATALOG_POLL_INTERVAL,
+    RETRIEVAL_METHOD,
+    cached_recommendations,
+    get_batch_recommendations,
+    loaded_backend,
+    loaded_index,
+    prepare_request,
+    query_backend,
+    query_filters,
+    reload_catalog,
+    result_cache,
+    score_queries,
+    score_requests,
+    start_catalog_watcher
+)
+
+# FastAPI service over the recommender core. Run it with
+# "uvicorn api:app"; it does not import Streamlit or pandas.
+
+logger = logging.getLogger(__name__)
+
+# Token required by admin endpoints; they are disabled when it is unset
+ADMIN_TOKEN = os.environ.get("SHL_ADMIN_TOKEN")
+# Request header that asks for a per-stage timing breakdown in the response
+PROFILE_HEADER = "X-Profile"
+# Queries longer than this, such as fetched job descriptions, are condensed
+# and keyed on the scoring pool instead of the event loop
+INLINE_QUERY_CHARS = 2000
+# Seconds clients are asked to wait before retrying while the index loads
+RETRY_AFTER_SECONDS = 5
+# Load the index when this module is imported. With a pre-forking server
+# ("gunicorn --preload") the master builds the index file once and every
+# worker starts with the index already mapped.
+PRELOAD_INDEX = os.environ.get("SHL_PRELOAD_INDEX", "").lower() in ("1", "true", "yes")
+
+# Scoring runs on a bounded thread pool, with concurrent queries that miss
+# the result cache coalesced into batches
+scorer = MicroBatcher(score_queries)
+
+# Load the catalog index, or open the catalog database in "sql" mode, logging
+# instead of raising so a bad catalog leaves the worker up and reporting not ready
+def load_index():
+    started = time.perf_counter()
+    try:
+        backend = query_backend()
+    except Exception:
+        logger.exception("Loading the catalog index failed")
+        return
+    logger.info("Catalog version %s with %d items ready in %.2fs",
+                backend.version, len(backend), time.perf_counter() - started)
+
+# Startup hook: load the index in the background so the worker comes up at
+# once and /api/ready turns healthy when it can serve, then keep the index
+# in sync with the catalog file. A catalog database is reopened by the
+# store itself when a new one is ingested, so it needs no watcher.
+@asynccontextmanager
+async def lifespan(app):
+    threading.Thread(target=load_index, name="index-loader", daemon=True).start()
+    watch = CATALOG_POLL_INTERVAL > 0 and RETRIEVAL_METHOD != "sql"
+    stop_event = start_catalog_watcher() if watch else None
+    yield
+    if stop_event is not None:
+        stop_event.set()
+    scorer.close()
+
+# Define the FastAPI app for the API endpoint
+app = FastAPI(
+    title="SHL Assessment Recommendation API",
+    description="API for recommending SHL assessments based on job descriptions or queries",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["Server-Timing"],
+)
+
+# Record request latency per route; with the profile header set, return the
+# pipeline stage timings as a Server-Timing header
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    profile = start_profile() if request.headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes") else None
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    
+    # Label by route template, not raw path, to keep the series count bounded
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(elapsed, route=route.path if route is not None else "unmatched")
+    if profile is not None:
+        response.headers["Server-Timing"] = server_timing(profile, elapsed)
+    return response
+
+# Model for API response
+class AssessmentVariant(BaseModel):
+    name: str
+    url: str
+
+class AssessmentRecommendation(BaseModel):
+    name: str
+    url: str
+    remote_testing: str
+    adaptive_support: str
+    duration: str
+    test_type: str
+    score: float
+    variants: Optional[List[AssessmentVariant]] = None
+
+class RecommendationResponse(BaseModel):
+    recommendations: List[AssessmentRecommendation]
+
+# Models for the batch API
+class BatchQuery(BaseModel):
+    query: str
+    top_k: int = Field(10, ge=1)
+    max_duration: Optional[int] = Field(None, description="Maximum assessment length in minutes")
+    test_type: Optional[List[str]] = Field(None, description="Allowed test types")
+    keys: Optional[List[str]] = Field(None, description="Allowed catalog key codes")
+    adaptive: Optional[bool] = Field(None, description="Require or exclude adaptive/IRT support")
+    remote: Optional[bool] = Field(None, description="Require or exclude remote testing")
+    expand_variants: bool = Field(False, description="List the near-duplicate variants folded into each result")
+
+class BatchRecommendationRequest(BaseModel):
+    queries: List[BatchQuery]
+
+class BatchRecommendationResponse(BaseModel):
+    results: List[RecommendationResponse]
+
+# Models for the typeahead API
+class Suggestion(BaseModel):
+    name: str
+    url: str
+    score: float
+
+class SuggestResponse(BaseModel):
+    suggestions: List[Suggestion]
+
+# Results carry the variants folded into them at ingest; they are only
+# returned when asked for
+def drop_variants(recommendations, expand_variants):
+    if not expand_variants:
+        for rec in recommendations:
+            rec.pop("variants", None)
+    return recommendations
+
+def overloaded():
+    return HTTPException(
+        status_code=503,
+        detail="Too many requests in progress",
+        headers={"Retry-After": "1"}
+    )
+
+# Index for a request, or 503 while the startup hook is still loading it.
+# The "sql" method is served from the catalog database instead, which only
+# has to exist. A server running on the database never loads the in-memory
+# index, so the methods that need it are refused there.
+def serving_index(method=None):
+    if (method or RETRIEVAL_METHOD) == "sql":
+        try:
+            return query_backend("sql")
+        except FileNotFoundError:
+            raise HTTPException(status_code=503, detail="Catalog database is missing")
+    if RETRIEVAL_METHOD == "sql":
+        raise HTTPException(status_code=400, detail=f"The {method} method is not available on a server using the sql backend")
+    index = loaded_index()
+    if index is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Catalog index is loading",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+    return index
+
+# API endpoint for recommendations
+@app.get("/api/recommend", response_model=RecommendationResponse, response_model_exclude_none=True)
+async def recommend(
+    query: str = Query(..., description="Job description or query text"),
+    url: Optional[str] = Query(None, description="URL to extract job description from"),
+    top_k: int = Query(10, ge=1, description="Number of recommendations to return"),
+    test_type: Optional[List[str]] = Query(None, description="Only return these test types"),
+    keys: Optional[List[str]] = Query(None, description="Only return assessments with any of these key codes (C, P, S, T, A, K, B, ...)"),
+    adaptive: Optional[bool] = Query(None, description="Require (true) or exclude (false) adaptive/IRT support"),
+    remote: Optional[bool] = Query(None, description="Require (true) or exclude (false) remote testing"),
+    max_duration: Optional[int] = Query(None, description="Maximum assessment length in minutes, overrides any limit in the query"),
+    method: Optional[Literal["tfidf", "embedding", "ann", "sql"]] = Query(None, description="Scoring method, defaults to the server setting"),
+    probes: Optional[int] = Query(None, ge=1, description="IVF lists probed in ann mode; more is slower but more accurate"),
+    candidates: Optional[int] = Query(None, ge=1, description="Coarse candidates re-ranked exactly in ann mode"),
+    expand_variants: bool = Query(False, description="List the near-duplicate variants folded into each result"),
+    diversify: bool = Query(False, description="Re-rank for variety so one assessment family does not fill the results"),
+    diversity: float = Query(DIVERSITY, ge=0.0, le=1.0, description="Weight of variety against relevance in diversify mode")
+):
+    if diversify and (method or RETRIEVAL_METHOD) == "sql":
+        raise HTTPException(status_code=400, detail="diversify is not available with the sql method")
+    serving_index(method)
+    if url:
+        try:
+            with stage("fetch"):
+                job_description = await get_fetcher().fetch(url)
+        except Exception:
+            # Fall back to the query text when the page cannot be fetched
+            job_description = ""
+        if job_description:
+            query = job_description
+    
+    # Filters, including a time limit in the query, are applied before ranking
+    filters = {
+        "test_type": test_type,
+        "keys": keys,
+        "adaptive": adaptive,
+        "remote": remote,
+        "max_duration": max_duration
+    }
+    request = (query, top_k, filters, method, probes, candidates, diversity if diversify else None)
+    try:
+        if len(query) > INLINE_QUERY_CHARS:
+            prepared = await scorer.run(prepare_request, *request)
+        else:
+            prepared = prepare_request(*request)
+        recommendations = cached_recommendations(prepared)
+        if recommendations is None:
+            with stage("scoring"):
+                recommendations, batch_profile = await scorer.submit(prepared)
+            extend_profile(batch_profile)
+    except Overloaded:
+        raise overloaded()
+    
+    return {"recommendations": drop_variants(recommendations, expand_variants)}
+
+# Scores of a batch request against the index. A time limit stated in a
+# query is read here, on the scoring pool, since queries may be long.
+def score_batch(queries, index, top_ks, filters):
+    filters = [query_filters(query, item_filters) for query, item_filters in zip(queries, filters)]
+    return get_batch_recommendations(queries, index.catalog_data, top_ks, index, filters)
+
+# API endpoint for scoring many queries in one request
+@app.post("/api/recommend/batch", response_model=BatchRecommendationResponse, response_model_exclude_none=True)
+async def recommend_batch(request: BatchRecommendationRequest):
+    # Each query counts against the pending limit, so a batch larger than
+    # the whole limit could never be admitted
+    if len(request.queries) > scorer.max_pending:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batches are limited to {scorer.max_pending} queries, got {len(request.queries)}"
+        )
+    index = serving_index()
+    
+    queries = [item.query for item in request.queries]
+    top_ks = [item.top_k for item in request.queries]
+    filters = [
+        item.model_dump(include={"test_type", "keys", "adaptive", "remote", "max_duration"})
+        for item in request.queries
+    ]
+    try:
+        if RETRIEVAL_METHOD == "sql":
+            batch_recommendations = await scorer.run(
+                score_requests,
+                [(query, top_k, item_filters, "sql", None, None, None) for query, top_k, item_filters in zip(queries, top_ks, filters)],
+                weight=len(queries)
+            )
+        else:
+            batch_recommendations = await scorer.run(
+                score_batch, queries, index, top_ks, filters,
+                weight=len(queries)
+            )
+    except Overloaded:
+        raise overloaded()
+    
+    return {"results": [
+        {"recommendations": drop_variants(recommendations, item.expand_variants)}
+        for item, recommendations in zip(request.queries, batch_recommendations)
+    ]}
+
+# API endpoint for as-you-type suggestions of assessment names. Lookups are a
+# binary search over a prefix index built with the catalog, cheap enough to
+# answer on the event loop.
+@app.get("/api/suggest", response_model=SuggestResponse)
+async def suggest(
+    q: str = Query(..., description="Partly typed assessment name, e.g. \"veri\" or \"java fr\""),
+    limit: int = Query(10, ge=1, le=50, description="Number of suggestions to return")
+):
+    return {"suggestions": serving_index().suggest(q, limit)}
+
+# Admin endpoints answer 404 unless SHL_ADMIN_TOKEN is configured, since CORS
+# lets any page send requests to this service
+def check_admin_token(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token is None or not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+# Admin endpoint to pick up a new catalog file without a restart
+@app.post("/api/admin/reload")
+async def admin_reload(x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    try:
+        if RETRIEVAL_METHOD == "sql":
+            # Opening the database picks up a newly ingested file; the
+            # catalog JSON and the in-memory index are left alone
+            previous = loaded_backend()
+            backend = await run_in_threadpool(query_backend)
+            reloaded = backend is not previous
+        else:
+            backend, reloaded = await run_in_threadpool(reload_catalog)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Catalog reload failed: {e}")
+    return {"version": backend.version, "reloaded": reloaded, "items": len(backend)}
+
+# Liveness probe: the worker is up, whether or not the index has loaded
+@app.get("/api/health")
+async def health():
+    return {"status": "ok"}
+
+# Readiness probe: 200 once the index is loaded (or the catalog database is
+# open) and requests can be served
+@app.get("/api/ready")
+async def ready():
+    backend = loaded_backend()
+    if backend is None:
+        return JSONResponse({"status": "loading"}, status_code=503, headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
+    return {"status": "ready", "version": backend.version, "items": len(backend)}
+
+# API endpoint exposing cache metrics
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return {
+        "results": result_cache.stats(),
+        "job_descriptions": get_fetcher().stats(),
+        "scoring": scorer.stats()
+    }
+
+# Scrape-time samples for the result cache and the job description cache
+def cache_samples(field):
+    def collect():
+        yield {"cache": "results"}, result_cache.stats()[field]
+        yield {"cache": "job_descriptions"}, get_fetcher().stats()[field]
+    return collect
+
+# Version and size of the catalog being served, once it is loaded
+def catalog_samples(value):
+    def collect():
+        backend = loaded_backend()
+        if backend is not None:
+            yield {"version": backend.version}, value(backend)
+    return collect
+
+registry.register(Callback("shl_cache_hits_total", "Cache lookups that found a live entry", "counter", cache_samples("hits")))
+registry.register(Callback("shl_cache_misses_total", "Cache lookups that found no live entry", "counter", cache_samples("misses")))
+registry.register(Callback("shl_cache_evictions_total", "Entries dropped to stay within the cache size", "counter", cache_samples("evictions")))
+registry.register(Callback("shl_cache_entries", "Entries currently held in the cache", "gauge", cache_samples("size")))
+registry.register(Callback(
+    "shl_job_description_fetch_failures_total", "Job description downloads that failed", "counter",
+    lambda: [({}, get_fetcher().failures)]
+))
+registry.register(Callback(
+    "shl_scoring_pending", "Requests queued for or being scored", "gauge",
+    lambda: [({}, scorer.pending)]
+))
+registry.register(Callback(
+    "shl_scoring_batches_total", "Scoring batches run", "counter",
+    lambda: [({}, scorer.batches)]
+))
+registry.register(Callback(
+    "shl_scoring_rejected_total", "Requests turned away with 503 because the scoring queue was full", "counter",
+    lambda: [({}, scorer.rejected)]
+))
+registry.register(Callback("shl_catalog_info", "Catalog version currently served", "gauge", catalog_samples(lambda index: 1)))
+registry.register(Callback(
+    "shl_catalog_items", "Assessments in the catalog currently served", "gauge",
+    catalog_samples(len)
+))
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+if PRELOAD_INDEX:
+    load_index()
+
+# Entry point to run FastAPI with Uvicorn when deployed as API
+def start_api(host="0.0.0.0", port=8000, workers=1):
+    import uvicorn
+    
+    if workers > 1:
+        # Build the index file once before the workers start, so each worker
+        # maps the shared file instead of fitting its own copy
+        load_index()
+    uvicorn.run("api:app", host=host, port=port, workers=workers)
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Serve the SHL recommendation API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes sharing one memory-mapped index")
+    args = parser.parse_args()
+    start_api(args.host, args.port, args.workers)
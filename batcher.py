@@ -0,0 +1,112 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import start_profile
+
+# Seconds to wait for more requests before scoring a batch
+BATCH_WINDOW = float(os.environ.get("SHL_BATCH_WINDOW_MS", "2")) / 1000
+MAX_BATCH_SIZE = int(os.environ.get("SHL_MAX_BATCH_SIZE", "64"))
+# Requests queued or being scored beyond which new ones are turned away
+MAX_PENDING = int(os.environ.get("SHL_MAX_PENDING", "256"))
+SCORING_WORKERS = int(os.environ.get("SHL_SCORING_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+class Overloaded(Exception):
+    pass
+
+
+# Coalesces requests that arrive within a short window into one call of
+# score_batch, run on a bounded thread pool instead of the event loop.
+# score_batch takes a list of items and returns one result per item.
+class MicroBatcher:
+    def __init__(self, score_batch, window=BATCH_WINDOW, max_batch_size=MAX_BATCH_SIZE,
+                 max_pending=MAX_PENDING, workers=SCORING_WORKERS):
+        self.score_batch = score_batch
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scoring")
+        self.pending = 0
+        self.batches = 0
+        self.rejected = 0
+        self._items = []
+        self._futures = []
+        self._timer = None
+
+    def _admit(self, count=1):
+        if self.pending + count > self.max_pending:
+            self.rejected += 1
+            raise Overloaded(f"{self.pending} requests already pending")
+        self.pending += count
+
+    # Result of score_batch for item, with the stage timings of its batch.
+    # Raises Overloaded instead of queueing past max_pending.
+    async def submit(self, item):
+        self._admit()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append(item)
+        self._futures.append(future)
+        if len(self._items) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        try:
+            return await future
+        finally:
+            self.pending -= 1
+
+    # Run fn(*args) on the scoring pool under the same queue limit, in a copy
+    # of the caller's context so its stages land in the request's profile
+    async def run(self, fn, *args, weight=1):
+        self._admit(weight)
+        try:
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(self.executor, context.run, fn, *args)
+        finally:
+            self.pending -= weight
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, futures = self._items, self._futures
+        self._items, self._futures = [], []
+        if items:
+            self.batches += 1
+            task = asyncio.get_running_loop().run_in_executor(self.executor, self._score, items)
+            task.add_done_callback(lambda done: self._resolve(done, futures))
+
+    # Score in a fresh context so the batch gets its own stage profile
+    def _score(self, items):
+        def run():
+            profile = start_profile()
+            return self.score_batch(items), profile
+        return contextvars.Context().run(run)
+
+    @staticmethod
+    def _resolve(done, futures):
+        error = done.exception()
+        if error is None:
+            results, profile = done.result()
+        for position, future in enumerate(futures):
+            if future.done():
+                continue  # The waiting request was cancelled
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result((results[position], profile))
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "max_pending": self.max_pending,
+            "window_ms": self.window * 1000
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=False)
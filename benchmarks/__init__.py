@@ -0,0 +1,6 @@
+# Benchmark and evaluation suite for the recommender.
+#
+#     python -m benchmarks --sizes 1000 10000 100000 --output bench_results.json
+#
+# Synthetic catalogs follow the shl_courses2.json schema; results include
+# recall@k / MAP@k, latency percentiles, throughput and peak memory.
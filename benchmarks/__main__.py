@@ -0,0 +1,51 @@
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+
+from benchmarks.runner import run_size
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recommendation quality, latency and memory on synthetic catalogs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="synthetic catalog sizes to run, e.g. 1000 10000 100000 1000000")
+    parser.add_argument("--queries", type=int, default=200, help="queries per catalog size")
+    parser.add_argument("--k", type=int, default=10, help="cutoff for recall@k and MAP@k")
+    parser.add_argument("--method", choices=("tfidf", "embedding", "ann"), default=None,
+                        help="scoring method (default: server setting)")
+    parser.add_argument("--no-api", action="store_true", help="skip the /api/recommend measurements")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file for the results")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "results": []
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sorted(args.sizes):
+            result = run_size(size, workdir, n_queries=args.queries, k=args.k, method=args.method, api=not args.no_api)
+            report["results"].append(result)
+            core = result["core"]
+            print(f"{size:>8} items: build {result['build_seconds']:.2f}s, "
+                  f"p50 {core['p50_ms']:.2f} ms, p99 {core['p99_ms']:.2f} ms, {core['qps']:.0f} qps, "
+                  f"recall@{args.k} {core[f'recall@{args.k}']:.3f}, peak RSS {result['peak_rss_mb'] or 0:.0f} MB")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
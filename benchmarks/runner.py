@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+import recommender
+from evaluation import apk, recall_at_k
+from benchmarks.synthetic import synthetic_catalog, synthetic_queries, write_catalog
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+# Peak resident set size of this process so far, in MB
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def latency_summary(latencies):
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "mean_ms": float(latencies_ms.mean()),
+        "qps": float(len(latencies_ms) / (latencies_ms.sum() / 1000)) if latencies_ms.sum() else None
+    }
+
+
+def quality_summary(predictions, queries, k):
+    recalls = [recall_at_k(predicted, q["expected_urls"], k) for predicted, q in zip(predictions, queries)]
+    maps = [apk(q["expected_urls"], predicted, k) for predicted, q in zip(predictions, queries)]
+    return {f"recall@{k}": float(np.mean(recalls)), f"map@{k}": float(np.mean(maps))}
+
+
+# Time get_recommendations directly against the index
+def run_core(index, queries, k, method=None):
+    latencies, predictions = [], []
+    for q in queries:
+        started = time.perf_counter()
+        recommendations = recommender.get_recommendations(q["query"], index.catalog_data, k, index=index, method=method)
+        latencies.append(time.perf_counter() - started)
+        predictions.append([rec["url"] for rec in recommendations])
+    return {**latency_summary(latencies), **quality_summary(predictions, queries, k)}
+
+
+# Time the /api/recommend endpoint through an in-process test client
+def run_api(queries, k, method=None):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    client = TestClient(api.app)
+    latencies, predictions = [], []
+    for q in queries:
+        params = {"query": q["query"], "top_k": k}
+        if method:
+            params["method"] = method
+        started = time.perf_counter()
+        response = client.get("/api/recommend", params=params)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+        predictions.append([rec["url"] for rec in response.json()["recommendations"]])
+    return {**latency_summary(latencies), **quality_summary(predictions, queries, k)}
+
+
+# Build a synthetic catalog of n_items, index it and measure both paths
+def run_size(n_items, workdir, n_queries=200, k=10, method=None, api=True):
+    catalog_path = os.path.join(workdir, f"catalog-{n_items}.json")
+    catalog = synthetic_catalog(n_items)
+    queries = synthetic_queries(catalog, n_queries)
+    write_catalog(catalog, catalog_path)
+    del catalog
+
+    started = time.perf_counter()
+    # Uncollapsed, so the scored matrix has n_items rows
+    catalog_data, version = recommender.load_catalog(catalog_path, fallback=False, collapse=False)
+    index = recommender.RecommenderIndex.build(catalog_data, version)
+    effective_method = method or recommender.RETRIEVAL_METHOD
+    if effective_method in ("embedding", "ann"):
+        # Embed the catalog under the work directory, not the shared
+        # index_cache; later lookups for this version reuse the cached store
+        recommender.get_vector_store(index, base_dir=os.path.join(workdir, "embeddings"))
+    if effective_method == "ann":
+        # Cluster now so the IVF build counts as build time, not as the
+        # latency of the first query
+        recommender.get_ann_index(index)
+    build_seconds = time.perf_counter() - started
+
+    result = {
+        "catalog_size": n_items,
+        "queries": len(queries),
+        "k": k,
+        "method": method or recommender.RETRIEVAL_METHOD,
+        "build_seconds": build_seconds,
+        "core": run_core(index, queries, k, method)
+    }
+    if api:
+        recommender.install_index(index)
+        result["api"] = run_api(queries, k, method)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
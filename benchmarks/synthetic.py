@@ -0,0 +1,67 @@
+import json
+import re
+
+import numpy as np
+
+SOURCE_CATALOG = "shl_courses2.json"
+# Variant suffixes seen on real catalog names
+VARIANTS = ("", "(New)", "- Short Form", "7.0", "7.1 (Americas)", "7.1 (International)",
+            "8.0 Job Focused Assessment", "Solution", "Profile", "Report")
+QUERY_PREFIXES = ("Hiring for", "Looking for an assessment for", "We need to screen", "Role:")
+
+
+# Real catalog names and key sets that synthetic items are drawn from
+def load_source(source=SOURCE_CATALOG):
+    with open(source, "r", encoding="utf-8") as f:
+        courses = json.load(f)
+    names = sorted({course["course_name"] for course in courses})
+    key_sets = [course["keys"] for course in courses]
+    return names, key_sets
+
+
+# Catalog of n_items records in the shl_courses2.json schema. Each name is a
+# real catalog name with an extra topic word and a variant suffix, so term
+# statistics stay close to the real catalog as it grows.
+def synthetic_catalog(n_items, seed=0, source=SOURCE_CATALOG):
+    rng = np.random.default_rng(seed)
+    names, key_sets = load_source(source)
+    vocabulary = sorted({token for name in names for token in re.findall(r"[A-Za-z]{3,}", name)})
+
+    # Zipf-like popularity so some topics are much more common than others
+    weights = 1.0 / np.arange(1, len(vocabulary) + 1)
+    weights /= weights.sum()
+
+    base = rng.integers(0, len(names), n_items)
+    topic = rng.choice(len(vocabulary), size=n_items, p=weights)
+    variant = rng.integers(0, len(VARIANTS), n_items)
+    keys = rng.integers(0, len(key_sets), n_items)
+
+    catalog = []
+    for i in range(n_items):
+        name = " ".join(part for part in (names[base[i]], vocabulary[topic[i]], VARIANTS[variant[i]]) if part)
+        catalog.append({
+            "course_id": str(i),
+            "course_name": name,
+            "course_url": f"https://catalog.example.com/view/{i}/",
+            "keys": list(key_sets[keys[i]])
+        })
+    return catalog
+
+
+# Queries paired with the URL of the item each one was written from. A query
+# drops one word of the item name and adds hiring phrasing around it.
+def synthetic_queries(catalog, n_queries, seed=1):
+    rng = np.random.default_rng(seed)
+    queries = []
+    for i in rng.choice(len(catalog), size=min(n_queries, len(catalog)), replace=False):
+        words = catalog[i]["course_name"].split()
+        if len(words) > 2:
+            del words[rng.integers(0, len(words))]
+        prefix = QUERY_PREFIXES[rng.integers(0, len(QUERY_PREFIXES))]
+        queries.append({"query": f"{prefix} {' '.join(words)}", "expected_urls": [catalog[i]["course_url"]]})
+    return queries
+
+
+def write_catalog(catalog, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False)
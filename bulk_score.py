@@ -0,0 +1,171 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from recommender import CATALOG_FILE, get_batch_recommendations, get_recommender_index, query_filters
+
+CHUNK_SIZE = 256
+TOP_K = 10
+REPORT_INTERVAL = 10.0
+CSV_FIELDS = ["offset", "id", "rank", "name", "url", "score", "duration", "test_type", "remote_testing", "adaptive_support"]
+
+
+def file_format(path, explicit=None):
+    if explicit:
+        return explicit
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+# (offset, id, query) for each input record, read lazily from CSV or JSONL
+def read_records(path, fmt, query_field, id_field=None):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(f) if fmt == "csv" else (json.loads(line) for line in f if line.strip())
+        for offset, row in enumerate(rows):
+            yield offset, row.get(id_field) if id_field else offset, row.get(query_field) or ""
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Offset to resume from given an earlier, possibly interrupted, output file.
+# The last record written may be incomplete, so the file is truncated to
+# where it starts and that record is scored again.
+def resume_offset(path, fmt):
+    if not os.path.exists(path):
+        return 0
+    last_offset, last_start = None, 0
+    with open(path, "rb") as f:
+        position = 0
+        for line in f:
+            start, position = position, position + len(line)
+            try:
+                text = line.decode("utf-8")
+                offset = int(json.loads(text)["offset"] if fmt == "jsonl" else next(csv.reader([text]))[0])
+            except (ValueError, KeyError, IndexError, StopIteration):
+                continue  # The CSV header or a torn last line
+            if offset != last_offset:
+                last_offset, last_start = offset, start
+    if last_offset is None:
+        return 0
+    with open(path, "r+b") as f:
+        f.truncate(last_start)
+    return last_offset
+
+
+def init_worker(catalog_file):
+    # Maps the index file the parent built; nothing is refitted per worker
+    get_recommender_index(catalog_file)
+
+
+# Score one chunk of records with a single sparse matrix product. A time
+# limit stated in a record ("... in 40 minutes") filters its results the way
+# process_duration_constraint does, through the same filters as the API.
+def score_chunk(chunk, top_k, catalog_file=CATALOG_FILE):
+    index = get_recommender_index(catalog_file)
+    queries = [query for _, _, query in chunk]
+    results = get_batch_recommendations(
+        queries, index.catalog_data, [top_k] * len(chunk), index=index,
+        filters=[query_filters(query) for query in queries]
+    )
+    return [(offset, record_id, recommendations) for (offset, record_id, _), recommendations in zip(chunk, results)]
+
+
+# Results of score_chunk for every chunk, in input order, with at most
+# `window` chunks in flight so memory stays bounded on any input size
+def score_stream(chunks, executor, top_k, catalog_file, window):
+    in_flight = deque()
+    for chunk in chunks:
+        in_flight.append(executor.submit(score_chunk, chunk, top_k, catalog_file))
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+class ResultWriter:
+    def __init__(self, path, fmt, append):
+        self.fmt = fmt
+        write_header = fmt == "csv" and not (append and os.path.exists(path) and os.path.getsize(path) > 0)
+        self.file = open(path, "a" if append else "w", encoding="utf-8", newline="")
+        if fmt == "csv":
+            self.writer = csv.DictWriter(self.file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if write_header:
+                self.writer.writeheader()
+
+    def write(self, offset, record_id, recommendations):
+        if self.fmt == "jsonl":
+            self.file.write(json.dumps(
+                {"offset": offset, "id": record_id, "recommendations": recommendations}, ensure_ascii=False
+            ) + "\n")
+        else:
+            for rank, rec in enumerate(recommendations, 1):
+                self.writer.writerow({**rec, "offset": offset, "id": record_id, "rank": rank})
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV or JSONL file of job postings against the assessment catalog")
+    parser.add_argument("input", help="CSV or JSONL file with one posting per record")
+    parser.add_argument("output", help="JSONL or CSV file for the recommendations")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="defaults to the input file extension")
+    parser.add_argument("--output-format", choices=("csv", "jsonl"), help="defaults to the output file extension")
+    parser.add_argument("--query-field", default="query", help="column or key holding the posting text")
+    parser.add_argument("--id-field", help="column or key copied to the output; defaults to the record offset")
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--catalog", default=CATALOG_FILE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--start", type=int, default=0, help="skip records before this offset")
+    parser.add_argument("--resume", action="store_true", help="continue an interrupted run, appending to the output")
+    args = parser.parse_args()
+
+    input_format = file_format(args.input, args.input_format)
+    output_format = file_format(args.output, args.output_format)
+    start = max(args.start, resume_offset(args.output, output_format)) if args.resume else args.start
+
+    # Build (or map) the shared index once before the workers start
+    get_recommender_index(args.catalog)
+
+    records = itertools.islice(read_records(args.input, input_format, args.query_field, args.id_field), start, None)
+    writer = ResultWriter(args.output, output_format, append=args.resume)
+    scored = 0
+    started = last_report = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(args.catalog,)) as executor:
+            chunks = chunked(records, args.chunk_size)
+            for results in score_stream(chunks, executor, args.top_k, args.catalog, window=2 * args.workers):
+                for offset, record_id, recommendations in results:
+                    writer.write(offset, record_id, recommendations)
+                writer.flush()
+                scored += len(results)
+                now = time.perf_counter()
+                if now - last_report >= REPORT_INTERVAL:
+                    print(f"{scored} rows, {scored / (now - started):.0f} rows/s, next offset {start + scored}", file=sys.stderr)
+                    last_report = now
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Scored {scored} rows from offset {start} in {elapsed:.1f}s "
+          f"({scored / elapsed if elapsed else 0:.0f} rows/s).")
+
+
+if __name__ == "__main__":
+    main()
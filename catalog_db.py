@@ -0,0 +1,294 @@
+import argparse
+import json
+import math
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+from condense import STOP_WORDS, WORD_RE
+from facets import parse_duration_minutes
+from suggest import SUGGEST_LIMIT, name_priorities, normalize
+
+# Optional SQLite backend for the catalog. Assessments are ingested once into
+# a database file with an FTS5 index over name and description and indexed
+# facet columns; a server then only opens the file, and candidates are found
+# and filtered by SQL, so memory does not grow with the catalog.
+
+# Bumped whenever the database schema changes
+DB_FORMAT = 3
+# Best text matches, by BM25, that are re-ranked per query
+SQL_CANDIDATES = int(os.environ.get("SHL_SQL_CANDIDATES", "200"))
+# BM25 weight of a name match relative to a description match
+NAME_WEIGHT = 2.0
+COLUMNS = "a.id, a.name, a.url, a.description, a.remote_testing, a.adaptive_support, a.duration, a.test_type, a.variants"
+
+SCHEMA = """
+CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE assessments (
+    id INTEGER PRIMARY KEY,
+    course_id TEXT,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    description TEXT NOT NULL,
+    remote_testing TEXT NOT NULL,
+    adaptive_support TEXT NOT NULL,
+    duration TEXT NOT NULL,
+    test_type TEXT NOT NULL,
+    duration_minutes INTEGER NOT NULL,
+    adaptive INTEGER NOT NULL,
+    remote INTEGER NOT NULL,
+    norm REAL NOT NULL,
+    priority REAL NOT NULL,
+    variants TEXT NOT NULL
+);
+CREATE INDEX assessments_test_type ON assessments (test_type);
+CREATE INDEX assessments_duration ON assessments (duration_minutes);
+CREATE INDEX assessments_flags ON assessments (adaptive, remote);
+CREATE TABLE assessment_keys (
+    key TEXT NOT NULL,
+    assessment_id INTEGER NOT NULL,
+    PRIMARY KEY (key, assessment_id)
+) WITHOUT ROWID;
+CREATE TABLE terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID;
+CREATE VIRTUAL TABLE assessments_fts USING fts5(
+    name, description, content='assessments', content_rowid='id', prefix='1 2 3'
+);
+"""
+
+
+# Terms of a text as counted for ranking: lower-cased words of two or more
+# characters that are not stop words
+def text_terms(text):
+    return [word for word in WORD_RE.findall(text.lower()) if len(word) > 1 and word not in STOP_WORDS]
+
+
+def item_text(item):
+    return f"{item['name']} {item.get('description') or ''}"
+
+
+# Smoothed inverse document frequency, as in scikit-learn's TfidfVectorizer
+def idf(df, total):
+    return math.log((1 + total) / (1 + df)) + 1
+
+
+# Write processed catalog items (see process_json_data) to a new database at
+# db_path. The file is built next to the target and renamed into place, so
+# servers with the old file open keep reading it until they reopen.
+def ingest(catalog_data, version, db_path):
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        document_terms = [Counter(text_terms(item_text(item))) for item in catalog_data]
+        df = Counter()
+        for counts in document_terms:
+            df.update(counts.keys())
+        total = len(catalog_data)
+        priorities = name_priorities(catalog_data)
+
+        def rows():
+            for position, (item, counts) in enumerate(zip(catalog_data, document_terms)):
+                norm = math.sqrt(sum((count * idf(df[term], total)) ** 2 for term, count in counts.items()))
+                yield (
+                    position, item.get("course_id"), item["name"], item["url"], item.get("description") or "",
+                    item["remote_testing"], item["adaptive_support"], item["duration"], item["test_type"],
+                    parse_duration_minutes(item["duration"]), item["adaptive_support"] == "Yes",
+                    item["remote_testing"] == "Yes", norm, priorities[item["name"]],
+                    json.dumps(item.get("variants", []), ensure_ascii=False)
+                )
+
+        with conn:
+            conn.executemany("INSERT INTO assessments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows())
+            conn.executemany(
+                "INSERT OR IGNORE INTO assessment_keys VALUES (?, ?)",
+                ((key, position) for position, item in enumerate(catalog_data) for key in item.get("keys") or ())
+            )
+            conn.executemany("INSERT INTO terms VALUES (?, ?)", df.items())
+            conn.execute("INSERT INTO assessments_fts (assessments_fts) VALUES ('rebuild')")
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("format", str(DB_FORMAT)), ("version", version), ("items", str(total))
+            ])
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+
+
+# Membership test over the catalog terms, answered from the database and
+# remembered, for condense_text's vocabulary boost
+class TermLookup:
+    def __init__(self, conn):
+        self.conn = conn
+        self.known = {}
+
+    def __contains__(self, term):
+        found = self.known.get(term)
+        if found is None:
+            found = self.known[term] = self.conn.execute(
+                "SELECT 1 FROM terms WHERE term = ?", (term,)
+            ).fetchone() is not None
+        return found
+
+
+# Read-only view of an ingested catalog database. Each thread gets its own
+# connection; nothing about the catalog is held in Python.
+class CatalogStore:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.file_id = self._file_id()
+        if self.file_id is None:
+            raise FileNotFoundError(f"{db_path} not found, create it with: python catalog_db.py")
+        self._local = threading.local()
+        meta = dict(self.connection().execute("SELECT name, value FROM meta"))
+        if int(meta["format"]) != DB_FORMAT:
+            raise ValueError(f"{db_path} has format {meta['format']}, expected {DB_FORMAT}")
+        self.version = meta["version"]
+        self.size = int(meta["items"])
+
+    def __len__(self):
+        return self.size
+
+    def _file_id(self):
+        try:
+            stat = os.stat(self.db_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    # Whether a new database has been ingested at db_path since this store
+    # was opened. A missing file is not a replacement.
+    def replaced(self):
+        file_id = self._file_id()
+        return file_id is not None and file_id != self.file_id
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @property
+    def vocabulary(self):
+        return TermLookup(self.connection())
+
+    # Typeahead suggestions of assessment names, as SuggestIndex.suggest
+    # gives them, from prefix queries on the name column
+    def suggest(self, prefix, limit=SUGGEST_LIMIT):
+        tokens = WORD_RE.findall(normalize(prefix))
+        if not tokens:
+            return []
+        match = "name : (" + " AND ".join(f'"{token}"*' for token in tokens) + ")"
+        rows = self.connection().execute(
+            "SELECT a.name, a.url, MAX(a.priority) AS score FROM assessments_fts "
+            "JOIN assessments a ON a.id = assessments_fts.rowid WHERE assessments_fts MATCH ? "
+            "GROUP BY a.name ORDER BY score DESC, a.name LIMIT ?",
+            (match, limit)
+        )
+        return [dict(row) for row in rows]
+
+    # WHERE clauses and parameters for facet filters, with the semantics of
+    # FacetIndex.mask: values within a facet are OR-ed, facets are AND-ed, and
+    # a duration limit that would leave nothing is dropped
+    def facet_clauses(self, test_type=None, keys=None, adaptive=None, remote=None, max_duration=None):
+        clauses, params = [], []
+        if test_type:
+            clauses.append(f"a.test_type IN ({', '.join('?' * len(test_type))})")
+            params.extend(test_type)
+        if keys:
+            clauses.append(f"a.id IN (SELECT assessment_id FROM assessment_keys WHERE key IN ({', '.join('?' * len(keys))}))")
+            params.extend(keys)
+        if adaptive is not None:
+            clauses.append("a.adaptive = ?")
+            params.append(int(adaptive))
+        if remote is not None:
+            clauses.append("a.remote = ?")
+            params.append(int(remote))
+        if max_duration is not None:
+            with_duration = clauses + ["a.duration_minutes <= ?"]
+            exists = self.connection().execute(
+                f"SELECT EXISTS (SELECT 1 FROM assessments a WHERE {' AND '.join(with_duration)})",
+                params + [max_duration]
+            ).fetchone()[0]
+            if exists:
+                clauses, params = with_duration, params + [max_duration]
+        return clauses, params
+
+    # Top-k (items, scores) for a preprocessed query among the items passing
+    # filters. FTS5 finds the best BM25 matches, which are re-ranked by TF-IDF
+    # cosine similarity; fewer than top_k matches are padded with zero-score
+    # items in catalog order, as RecommenderIndex.search does.
+    def search(self, query, top_k, filters=None, candidates=SQL_CANDIDATES):
+        conn = self.connection()
+        clauses, params = self.facet_clauses(**(filters or {}))
+        query_counts = Counter(text_terms(query))
+
+        rows = []
+        if query_counts:
+            match = " OR ".join('"' + term.replace('"', '""') + '"' for term in query_counts)
+            where = " AND ".join(["assessments_fts MATCH ?"] + clauses)
+            rows = conn.execute(
+                f"SELECT {COLUMNS}, a.norm FROM assessments_fts JOIN assessments a ON a.id = assessments_fts.rowid "
+                f"WHERE {where} ORDER BY bm25(assessments_fts, {NAME_WEIGHT}, 1.0) LIMIT ?",
+                [match, *params, max(candidates, top_k)]
+            ).fetchall()
+
+        scored = []
+        if rows:
+            terms = list(query_counts)
+            df = dict(conn.execute(f"SELECT term, df FROM terms WHERE term IN ({', '.join('?' * len(terms))})", terms))
+            query_weights = {term: count * idf(df[term], self.size) for term, count in query_counts.items() if term in df}
+            query_norm = math.sqrt(sum(weight ** 2 for weight in query_weights.values()))
+            for row in rows:
+                document_counts = Counter(text_terms(f"{row['name']} {row['description']}"))
+                dot = sum(
+                    weight * document_counts[term] * idf(df[term], self.size)
+                    for term, weight in query_weights.items() if term in document_counts
+                )
+                scored.append((dot / (query_norm * row["norm"]) if dot else 0.0, row))
+            scored.sort(key=lambda pair: (-pair[0], pair[1]["id"]))
+            scored = [pair for pair in scored[:top_k] if pair[0] > 0]
+
+        missing = top_k - len(scored)
+        if missing > 0:
+            found = [row["id"] for _, row in scored]
+            where = " AND ".join(clauses + [f"a.id NOT IN ({', '.join('?' * len(found))})"] if found else clauses) or "1"
+            filler = conn.execute(
+                f"SELECT {COLUMNS} FROM assessments a WHERE {where} ORDER BY a.id LIMIT ?",
+                [*params, *found, missing]
+            ).fetchall()
+            scored.extend((0.0, row) for row in filler)
+
+        items = [{**dict(row), "variants": json.loads(row["variants"])} for _, row in scored]
+        return items, [score for score, _ in scored]
+
+
+def main():
+    from dedup import COLLAPSE_VARIANTS, collapse_variants
+    from recommender import CATALOG_DB, CATALOG_FILE, catalog_version, load_catalog
+
+    parser = argparse.ArgumentParser(description="Ingest catalog JSON files into an SQLite catalog database")
+    parser.add_argument("catalogs", nargs="*", default=[CATALOG_FILE], help="scraped catalog JSON files, merged in order")
+    parser.add_argument("--output", default=CATALOG_DB)
+    args = parser.parse_args()
+
+    # Variants are collapsed across the merged catalogs, not per file
+    catalog_data, versions = [], []
+    for json_file in args.catalogs:
+        items, version = load_catalog(json_file, fallback=False, collapse=False)
+        catalog_data.extend(items)
+        versions.append(version)
+    version = catalog_version(json.dumps(versions).encode("utf-8"))
+    if COLLAPSE_VARIANTS:
+        catalog_data = collapse_variants(catalog_data)
+
+    ingest(catalog_data, version, args.output)
+    print(f"✅ Ingested {len(catalog_data)} assessments into {args.output} (version {version}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import os
+import re
+from collections import Counter
+
+# Longest query, in tokens, that is scored as written. Longer text such as a
+# fetched job description is condensed to its key phrases within this budget.
+QUERY_TOKEN_BUDGET = int(os.environ.get("SHL_QUERY_TOKEN_BUDGET", "128"))
+# Characters of a long text that are read at all, which keeps the cost of
+# condensing a multi-hundred-KB page bounded
+MAX_SCAN_CHARS = 20000
+# Weight of words the catalog vocabulary knows, e.g. skill and tool names
+VOCABULARY_BOOST = 3.0
+
+WORD_RE = re.compile(r"\w+")
+LINE_RE = re.compile(r"[^\n]+")
+# Splits a line into runs of words that can form one phrase
+CLAUSE_RE = re.compile(r"[^,.;:!?()\[\]|/•·–—\t]+")
+# Lines of site chrome and legal text found around job postings
+BOILERPLATE_RE = re.compile(
+    r"cookie|privacy|terms of (use|service)|all rights reserved|©|copyright|sign (in|up)|log ?in|"
+    r"subscribe|newsletter|follow us|share (this|on)|skip to|back to (search|jobs)|similar jobs|"
+    r"apply (now|today|online)|equal opportunity|javascript|your browser",
+    re.I
+)
+
+STOP_WORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each etc few for from further
+had has have having he her here hers him his how i if in into is it its itself just like may me
+might more most must my no nor not now of off on once only or other our ours out over own per
+same shall she should so some such than that the their theirs them then there these they this
+those through to too under until up upon us very via was we were what when where which while who
+whom why will with within without would you your yours
+""".split())
+
+
+# Whether text has more than budget words, reading no further than needed
+def exceeds_budget(text, budget):
+    for count, _ in enumerate(WORD_RE.finditer(text), 1):
+        if count > budget:
+            return True
+    return False
+
+
+def iter_lines(text):
+    for match in LINE_RE.finditer(text):
+        yield match.group()
+
+
+# Lines of text without site chrome: boilerplate matches and repeated lines
+# (menus and footers that appear more than once) are dropped
+def content_lines(text):
+    seen = set()
+    for line in iter_lines(text):
+        line = line.strip()
+        if not line or line in seen or BOILERPLATE_RE.search(line):
+            continue
+        seen.add(line)
+        yield line
+
+
+# Candidate key phrases, as tuples of lower-cased words, in reading order.
+# Phrases are broken at punctuation and stop words, as in RAKE.
+def iter_phrases(lines):
+    for line in lines:
+        for clause in CLAUSE_RE.finditer(line):
+            phrase = []
+            for word in WORD_RE.finditer(clause.group()):
+                word = word.group().lower()
+                if word in STOP_WORDS or word.isdigit():
+                    if phrase:
+                        yield tuple(phrase)
+                    phrase = []
+                else:
+                    phrase.append(word)
+            if phrase:
+                yield tuple(phrase)
+
+
+# Key phrases of a long text ranked by salience and joined into a query of
+# at most budget words. Word scores follow RAKE (co-occurrence degree over
+# frequency) with a boost for words in the catalog vocabulary. Text within
+# the budget is returned unchanged.
+def condense_text(text, budget=QUERY_TOKEN_BUDGET, vocabulary=None):
+    if not exceeds_budget(text, budget):
+        return text
+
+    frequency = Counter()
+    degree = Counter()
+    phrase_counts = Counter()
+    first_seen = {}
+    for phrase in iter_phrases(content_lines(text[:MAX_SCAN_CHARS])):
+        # Long runs are usually sentences, not terms; keep their head
+        phrase = phrase[:4]
+        phrase_counts[phrase] += 1
+        first_seen.setdefault(phrase, len(first_seen))
+        for word in phrase:
+            frequency[word] += 1
+            degree[word] += len(phrase)
+
+    def word_score(word):
+        score = degree[word] / frequency[word]
+        if vocabulary is not None and word in vocabulary:
+            score *= VOCABULARY_BOOST
+        return score
+
+    ranked = sorted(
+        phrase_counts,
+        key=lambda phrase: (-sum(word_score(word) for word in phrase) * phrase_counts[phrase], first_seen[phrase])
+    )
+    selected, used = [], 0
+    for phrase in ranked:
+        if used + len(phrase) > budget:
+            continue
+        selected.append(phrase)
+        used += len(phrase)
+        if used >= budget:
+            break
+    # Back in reading order, which keeps the query legible
+    selected.sort(key=first_seen.get)
+    return " ".join(" ".join(phrase) for phrase in selected)
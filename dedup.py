@@ -0,0 +1,147 @@
+import os
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from condense import WORD_RE
+from suggest import normalize
+
+# Near-duplicate collapsing of catalog variants, such as "Apprentice 8.0 Job
+# Focused Assessment" and "Apprentice + 8.0 Job Focused Assessment". Items
+# are compared by MinHash signatures of their name and description shingles
+# and grouped with LSH banding, so no pair of items is compared unless it
+# shares a band; each group is kept as one canonical item.
+
+# Collapse variants when catalogs are loaded; "0" keeps every item
+COLLAPSE_VARIANTS = os.environ.get("SHL_COLLAPSE_VARIANTS", "1").lower() not in ("0", "false", "no")
+# Estimated Jaccard similarity of shingle sets from which items are variants
+SIMILARITY_THRESHOLD = 0.8
+# MinHash functions per signature, split into bands of NUM_PERM // BANDS
+# rows. 16 bands of 4 rows make pairs at the threshold candidates with
+# probability above 0.999.
+NUM_PERM = 64
+BANDS = 16
+NAME_SHINGLE_CHARS = 4
+DESCRIPTION_SHINGLE_WORDS = 3
+# Items hashed together when computing signatures
+SIGNATURE_CHUNK = 1024
+# Canonical items kept per LSH bucket
+MAX_BUCKET_SIZE = 32
+# Largest prime below 2**32, the modulus of the MinHash functions
+HASH_PRIME = 4294967291
+
+# Fixed hash parameters, so every process collapses a catalog the same way
+_rng = np.random.default_rng(20240401)
+_HASH_A = _rng.integers(1, HASH_PRIME, NUM_PERM, dtype=np.uint64)
+_HASH_B = _rng.integers(0, HASH_PRIME, NUM_PERM, dtype=np.uint64)
+
+
+# Prefix hashed into the version of a collapsed catalog, so indexes built
+# with and without collapsing, or with other parameters, are never mixed up
+def version_salt():
+    return f"variants:{SIMILARITY_THRESHOLD}:{NUM_PERM}:{BANDS}\n".encode("utf-8")
+
+
+# Character shingles of the name and word shingles of the description
+def shingles(item):
+    name = " ".join(WORD_RE.findall(normalize(item["name"])))
+    grams = {name[i:i + NAME_SHINGLE_CHARS] for i in range(max(1, len(name) - NAME_SHINGLE_CHARS + 1))}
+    words = WORD_RE.findall(normalize(item.get("description") or ""))
+    grams.update(
+        " ".join(words[i:i + DESCRIPTION_SHINGLE_WORDS])
+        for i in range(len(words) - DESCRIPTION_SHINGLE_WORDS + 1)
+    )
+    return grams
+
+
+# MinHash signatures of the items, one row each. Items are hashed a chunk
+# at a time, with the minimum per item taken by one reduceat.
+def minhash_signatures(catalog_data):
+    signatures = np.empty((len(catalog_data), NUM_PERM), dtype=np.uint64)
+    for start in range(0, len(catalog_data), SIGNATURE_CHUNK):
+        gram_sets = [shingles(item) for item in catalog_data[start:start + SIGNATURE_CHUNK]]
+        hashes = np.fromiter(
+            (zlib.crc32(gram.encode("utf-8")) for grams in gram_sets for gram in grams), dtype=np.uint64
+        )
+        # Every item has at least one shingle, so no segment is empty
+        offsets = np.cumsum([0] + [len(grams) for grams in gram_sets[:-1]])
+        # a, b and the hashes are below 2**32, so a * hash + b fits in 64 bits
+        values = (hashes[:, None] * _HASH_A + _HASH_B) % np.uint64(HASH_PRIME)
+        signatures[start:start + len(gram_sets)] = np.minimum.reduceat(values, offsets, axis=0)
+    return signatures
+
+
+# Facets that must match exactly, so a collapsed item filters like its variants
+def facet_key(item):
+    return item.get("test_type"), item.get("duration"), item.get("remote_testing"), item.get("adaptive_support")
+
+
+# Position of the canonical item for every item. Items are visited in
+# catalog order: one joins the most similar canonical item it shares an LSH
+# bucket with, if that one is similar enough, and becomes canonical
+# otherwise. Comparing with canonical items only avoids chaining a series
+# of small edits into one large group.
+def variant_roots(catalog_data, threshold=SIMILARITY_THRESHOLD):
+    size = len(catalog_data)
+    signatures = minhash_signatures(catalog_data)
+    facet_ids = {}
+    facets = np.array([facet_ids.setdefault(facet_key(item), len(facet_ids)) for item in catalog_data], dtype=np.uint64)
+
+    # Bucket of every item in every band, numbered apart across bands
+    rows = NUM_PERM // BANDS
+    buckets = np.empty((size, BANDS), dtype=np.int64)
+    for band in range(BANDS):
+        keys = np.ascontiguousarray(np.column_stack([facets, signatures[:, band * rows:(band + 1) * rows]]))
+        keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+        _, inverse = np.unique(keys, return_inverse=True)
+        buckets[:, band] = inverse.ravel() + band * size
+
+    canonical = defaultdict(list)
+    roots = []
+    for position, item_buckets in enumerate(buckets.tolist()):
+        root = position
+        candidates = sorted({other for bucket in item_buckets for other in canonical.get(bucket, ())})
+        if candidates:
+            agreement = (signatures[candidates] == signatures[position]).mean(axis=1)
+            best = int(agreement.argmax())
+            if agreement[best] >= threshold:
+                root = candidates[best]
+        if root == position:
+            for bucket in item_buckets:
+                # A crowded bucket takes no more canonical items, which bounds
+                # the comparisons per item; the other bands still match them
+                if len(canonical[bucket]) < MAX_BUCKET_SIZE:
+                    canonical[bucket].append(position)
+        roots.append(root)
+    return roots
+
+
+# Processed catalog items (see process_json_data) with each group of near-
+# duplicates replaced by its first item. The canonical item lists the others
+# under "variants" and carries the union of their keys.
+def collapse_variants(catalog_data, threshold=SIMILARITY_THRESHOLD):
+    if len(catalog_data) < 2:
+        return catalog_data
+    groups = defaultdict(list)
+    for position, root in enumerate(variant_roots(catalog_data, threshold)):
+        groups[root].append(position)
+
+    collapsed = []
+    for root, positions in groups.items():
+        item = catalog_data[root]
+        if len(positions) > 1:
+            variants = [catalog_data[position] for position in positions[1:]]
+            keys = list(item.get("keys") or [])
+            # The catalog lists one assessment under several categories, so
+            # each variant URL is attached once
+            urls = {item["url"]}
+            attached = []
+            for variant in variants:
+                keys.extend(key for key in variant.get("keys") or [] if key not in keys)
+                if variant["url"] not in urls:
+                    urls.add(variant["url"])
+                    attached.append({"course_id": variant.get("course_id"), "name": variant["name"], "url": variant["url"]})
+            item = {**item, "keys": keys, "variants": attached}
+        collapsed.append(item)
+    return collapsed
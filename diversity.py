@@ -0,0 +1,88 @@
+import numpy as np
+
+from retrieval import select_top_k
+
+# Nearest neighbours kept per catalog item in the similarity graph
+GRAPH_NEIGHBOURS = 16
+# Rows of the catalog matrix multiplied at a time when building the graph
+GRAPH_CHUNK = 512
+# Terms found in more catalog items than this are left out of the graph
+# product. Such terms carry little weight after IDF but make the product
+# dense on large catalogs; smaller catalogs keep every term.
+GRAPH_MAX_POSTINGS = 500
+# Default weight of diversity against relevance in diversify mode
+DIVERSITY = 0.3
+# Candidates re-ranked per result in diversify mode
+DIVERSIFY_POOL_FACTOR = 4
+
+
+# Sparse k-nearest-neighbour graph over L2-normalised catalog vectors, built
+# once per index so re-ranking only looks up precomputed similarities
+class ItemGraph:
+    def __init__(self, indptr, indices, weights):
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+    # Graph of each row's most similar other rows by cosine similarity
+    @classmethod
+    def build(cls, matrix, neighbours=GRAPH_NEIGHBOURS, chunk=GRAPH_CHUNK, max_postings=GRAPH_MAX_POSTINGS):
+        size = matrix.shape[0]
+        matrix = matrix.tocsc()
+        postings = np.diff(matrix.indptr)
+        if postings.max(initial=0) > max_postings:
+            matrix = matrix[:, np.flatnonzero(postings <= max_postings)]
+        matrix = matrix.tocsr()
+        indices, weights = [], []
+        lengths = np.zeros(size, dtype=np.int64)
+        transposed = matrix.T.tocsc()
+        for start in range(0, size, chunk):
+            block = (matrix[start:start + chunk] @ transposed).tocsr()
+            for offset in range(block.shape[0]):
+                row = start + offset
+                begin, end = block.indptr[offset], block.indptr[offset + 1]
+                columns, similarities = block.indices[begin:end], block.data[begin:end]
+                keep = (columns != row) & (similarities > 0)
+                columns, similarities = select_top_k(columns[keep], similarities[keep], neighbours)
+                indices.append(columns)
+                weights.append(similarities)
+                lengths[row] = len(columns)
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        return cls(
+            indptr,
+            np.concatenate(indices).astype(np.int32) if indices else np.zeros(0, dtype=np.int32),
+            np.concatenate(weights).astype(np.float32) if weights else np.zeros(0, dtype=np.float32)
+        )
+
+    # Arrays that fully describe the graph, for writing to an index file
+    def arrays(self):
+        return {"indptr": self.indptr, "indices": self.indices, "weights": self.weights}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(arrays["indptr"], arrays["indices"], arrays["weights"])
+
+    # Pick k of the ranked (doc_ids, scores) by maximal marginal relevance.
+    # Each pick maximises (1 - diversity) * score - diversity * (similarity to
+    # the closest item already picked); items that are not graph neighbours
+    # count as dissimilar. Zero-score padding is only used to fill up to k.
+    # Scores are returned unchanged, and diversity 0 keeps the original order.
+    def rerank(self, doc_ids, scores, k, diversity=DIVERSITY):
+        matched = np.flatnonzero(scores > 0)
+        positions = {doc: position for position, doc in enumerate(doc_ids[matched].tolist())}
+        redundancy = np.zeros(len(matched))
+        picked = []
+        for _ in range(min(k, len(matched))):
+            gains = (1 - diversity) * scores[matched] - diversity * redundancy
+            gains[picked] = -np.inf
+            best = int(np.argmax(gains))
+            picked.append(best)
+            doc = doc_ids[matched[best]]
+            start, end = self.indptr[doc], self.indptr[doc + 1]
+            for neighbour, similarity in zip(self.indices[start:end].tolist(), self.weights[start:end].tolist()):
+                position = positions.get(neighbour)
+                if position is not None and similarity > redundancy[position]:
+                    redundancy[position] = similarity
+        order = np.concatenate([matched[picked], np.flatnonzero(scores <= 0)])[:k].astype(np.int64)
+        return doc_ids[order], scores[order]
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+EMBEDDINGS_DIR = os.path.join("index_cache", "embeddings")
+# Embedding backend used when none is named explicitly
+DEFAULT_EMBEDDER = os.environ.get("SHL_EMBEDDER", "hashing")
+EMBED_BATCH_SIZE = 64
+
+
+# Interface for text embedding backends. Implementations return one
+# L2-normalised float32 row per input text.
+class Embedder:
+    name = "base"
+    dim = 0
+
+    def embed(self, texts):
+        raise NotImplementedError
+
+
+def normalize_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+# Deterministic local embedder: signed feature hashing of word unigrams and
+# bigrams. Needs no model or network, which makes it the test and offline default.
+class HashingEmbedder(Embedder):
+    def __init__(self, dim=512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        tokens = re.findall(r"\w+", text.lower())
+        return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, bucket] += sign
+        return normalize_rows(vectors)
+
+
+# Google Gemini embeddings, as described in app_config.json. Requires the
+# optional google-generativeai package and a GOOGLE_API_KEY.
+class GeminiEmbedder(Embedder):
+    def __init__(self, model="models/text-embedding-004", api_key=None):
+        try:
+            import google.generativeai as genai
+        except ImportError as e:
+            raise ImportError("GeminiEmbedder requires the google-generativeai package") from e
+        genai.configure(api_key=api_key or os.environ["GOOGLE_API_KEY"])
+        self.genai = genai
+        self.model = model
+        self.name = f"gemini-{model.rsplit('/', 1)[-1]}"
+        self.dim = len(self.embed(["dimension probe"])[0])
+
+    def embed(self, texts):
+        result = self.genai.embed_content(model=self.model, content=list(texts))
+        return normalize_rows(np.asarray(result["embedding"], dtype=np.float32).reshape(len(texts), -1))
+
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+    "gemini": GeminiEmbedder
+}
+
+_embedders = {}
+
+
+# Shared embedder instance for a backend name
+def get_embedder(name=DEFAULT_EMBEDDER):
+    if name not in _embedders:
+        _embedders[name] = EMBEDDERS[name]()
+    return _embedders[name]
+
+
+# Embed a single text with the default backend
+def embed_text(text, embedder=None):
+    return (embedder or get_embedder()).embed([text])[0]
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Catalog embeddings stored as a memory-mapped .npy matrix. Rows are cached
+# by the hash of the text they embed, so rebuilding for a new catalog only
+# embeds texts that are new or changed.
+class VectorStore:
+    def __init__(self, matrix, hashes, embedder):
+        self.matrix = matrix
+        self.hashes = hashes
+        self.embedder = embedder
+
+    @staticmethod
+    def _paths(store_dir):
+        return os.path.join(store_dir, "vectors.npy"), os.path.join(store_dir, "hashes.json")
+
+    # Open an existing store read-only; the vectors are paged in on demand
+    @classmethod
+    def open(cls, store_dir, embedder):
+        vectors_path, hashes_path = cls._paths(store_dir)
+        if not (os.path.exists(vectors_path) and os.path.exists(hashes_path)):
+            return None
+        with open(hashes_path, "r", encoding="utf-8") as f:
+            hashes = json.load(f)
+        return cls(np.load(vectors_path, mmap_mode="r"), hashes, embedder)
+
+    # Store holding one row per text, in order. Rows whose text hash appears
+    # in the previous store are copied instead of re-embedded.
+    @classmethod
+    def build(cls, texts, embedder, store_dir, previous=None, dtype=np.float32, batch_size=EMBED_BATCH_SIZE):
+        os.makedirs(store_dir, exist_ok=True)
+        vectors_path, hashes_path = cls._paths(store_dir)
+
+        previous_rows = {}
+        if previous is not None and previous.matrix.shape[1] == embedder.dim:
+            previous_rows = {h: row for row, h in enumerate(previous.hashes)}
+
+        hashes = [text_hash(text) for text in texts]
+        # Builders in other processes or threads may write the same store at
+        # once; each writes its own files and the last rename wins
+        suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp_path = f"{vectors_path}.{suffix}.npy"
+        matrix = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=(len(texts), embedder.dim))
+        missing = []
+        for row, h in enumerate(hashes):
+            if h in previous_rows:
+                matrix[row] = previous.matrix[previous_rows[h]]
+            else:
+                missing.append(row)
+        for start in range(0, len(missing), batch_size):
+            rows = missing[start:start + batch_size]
+            matrix[rows] = embedder.embed([texts[row] for row in rows])
+        matrix.flush()
+        del matrix
+
+        os.replace(tmp_path, vectors_path)
+        with open(f"{hashes_path}.{suffix}", "w", encoding="utf-8") as f:
+            json.dump(hashes, f)
+        os.replace(f"{hashes_path}.{suffix}", hashes_path)
+        return cls.open(store_dir, embedder)
+
+    # Cosine similarity of a query against every row in one dot product
+    def score(self, query_text):
+        return self.score_vector(self.embedder.embed([query_text])[0])
+
+    def score_vector(self, query_vector):
+        return np.asarray(self.matrix @ query_vector.astype(self.matrix.dtype), dtype=np.float32)
+
+
+# Vector store for a catalog version, opened from disk when it exists and
+# otherwise built from the texts, reusing rows of the last version built
+def load_or_build_store(version, texts, embedder=None, base_dir=EMBEDDINGS_DIR, dtype=np.float32):
+    embedder = embedder or get_embedder()
+    embedder_dir = os.path.join(base_dir, embedder.name)
+    version_dir = os.path.join(embedder_dir, str(version))
+
+    store = VectorStore.open(version_dir, embedder)
+    if store is not None and len(store.hashes) == len(texts):
+        return store
+
+    latest_path = os.path.join(embedder_dir, "latest.json")
+    previous = None
+    if os.path.exists(latest_path):
+        with open(latest_path, "r", encoding="utf-8") as f:
+            previous = VectorStore.open(os.path.join(embedder_dir, json.load(f)["version"]), embedder)
+
+    store = VectorStore.build(texts, embedder, version_dir, previous=previous, dtype=dtype)
+    latest_tmp = f"{latest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(latest_tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": str(version)}, f)
+    os.replace(latest_tmp, latest_path)
+    return store
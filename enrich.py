@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from scrape2 import HTML_PARSER, OUTPUT_FILE, RATE_LIMIT, REQUEST_TIMEOUT, RateLimiter, response_html
+
+HTTP_CACHE_DIR = "http_cache"
+CHECKPOINT_FILE = "enrich_checkpoint.jsonl"
+ENRICH_WORKERS = 8
+
+
+# On-disk HTTP cache that revalidates entries with ETag / Last-Modified
+class HttpCache:
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, session=None):
+        self.cache_dir = cache_dir
+        self.session = session or requests.Session()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.stats = {"fetched": 0, "revalidated": 0}
+        self.lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def _count(self, name):
+        with self.lock:
+            self.stats[name] += 1
+
+    # Page body for url; a 304 answer reuses the stored copy
+    def get(self, url):
+        meta_path, body_path = self._paths(url)
+        meta = None
+        if os.path.exists(meta_path) and os.path.exists(body_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        if response.status_code == 304 and meta:
+            self._count("revalidated")
+            with open(body_path, "rb") as f:
+                return f.read()
+        response.raise_for_status()
+        self._count("fetched")
+
+        body = response_html(response)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        write_atomic(body_path, body)
+        write_atomic(meta_path, json.dumps({
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }).encode("utf-8"))
+        return body
+
+
+def write_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# Text that follows a product page heading such as "Description"
+def section_text(soup, heading):
+    for tag in soup.find_all(["h2", "h3", "h4"]):
+        if tag.get_text().strip().lower().startswith(heading.lower()):
+            texts = []
+            for sibling in tag.find_next_siblings():
+                if sibling.name in ("h2", "h3", "h4"):
+                    break
+                texts.append(sibling.get_text(" ", strip=True))
+            return " ".join(text for text in texts if text) or None
+    return None
+
+
+# Yes/No flag shown next to a label like "Remote Testing:", None when absent
+def flag_after_label(soup, label):
+    for node in soup.find_all(string=re.compile(re.escape(label), re.I)):
+        container = node.parent
+        for _ in range(3):
+            if container is None:
+                break
+            if container.select_one(".-yes"):
+                return True
+            if container.select_one(".-no, .catalogue__circle"):
+                return False
+            container = container.parent
+    return None
+
+
+# Description, length, remote and adaptive flags from an assessment page
+def extract_course_details(html):
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    duration_minutes = None
+    length_text = section_text(soup, "Assessment length")
+    if length_text:
+        duration_match = re.search(r'(\d+)(?:\s*-\s*(\d+))?', length_text)
+        if duration_match:
+            duration_minutes = int(duration_match.group(2) or duration_match.group(1))
+
+    return {
+        "description": section_text(soup, "Description"),
+        "duration_minutes": duration_minutes,
+        "remote_testing": flag_after_label(soup, "Remote Testing"),
+        "adaptive_irt": flag_after_label(soup, "Adaptive/IRT")
+    }
+
+
+# Completed enrichments from an interrupted run, keyed by course URL
+def load_checkpoint(checkpoint_file=CHECKPOINT_FILE):
+    done = {}
+    if os.path.exists(checkpoint_file):
+        with open(checkpoint_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A torn last line from a crash
+                done[entry["course_url"]] = entry["details"]
+    return done
+
+
+# Add page details to every course, fetching each distinct URL once.
+# Finished URLs are appended to the checkpoint so a crashed run resumes
+# where it stopped; the checkpoint is removed when the run completes.
+def enrich_courses(courses, cache_dir=HTTP_CACHE_DIR, checkpoint_file=CHECKPOINT_FILE,
+                   workers=ENRICH_WORKERS, rate=RATE_LIMIT):
+    done = load_checkpoint(checkpoint_file)
+    pending = sorted({course["course_url"] for course in courses} - set(done))
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    cache = HttpCache(cache_dir, session)
+    limiter = RateLimiter(rate)
+    failures = 0
+
+    def enrich_one(url):
+        limiter.wait()
+        return extract_course_details(cache.get(url))
+
+    with open(checkpoint_file, "a", encoding="utf-8") as checkpoint, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(enrich_one, url): url for url in pending}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                details = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"Failed to enrich {url}: {e}")
+                continue
+            done[url] = details
+            checkpoint.write(json.dumps({"course_url": url, "details": details}, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+
+    if failures == 0 and os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+
+    enriched = []
+    for course in courses:
+        details = done.get(course["course_url"])
+        enriched.append({**course, **details} if details else dict(course))
+    return enriched, cache.stats, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add details from each assessment page to the scraped catalog")
+    parser.add_argument("--input", default=OUTPUT_FILE, help="catalog JSON produced by scrape2.py")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="enriched catalog JSON to write")
+    parser.add_argument("--cache-dir", default=HTTP_CACHE_DIR, help="directory for cached pages")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="resume file for interrupted runs")
+    parser.add_argument("--workers", type=int, default=ENRICH_WORKERS, help="concurrent page fetches")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="max requests per second")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        courses = json.load(f)
+
+    started = time.perf_counter()
+    enriched, stats, failures = enrich_courses(
+        courses, args.cache_dir, args.checkpoint, workers=args.workers, rate=args.rate
+    )
+    elapsed = time.perf_counter() - started
+
+    write_atomic(args.output, json.dumps(enriched, ensure_ascii=False, indent=4).encode("utf-8"))
+    print(f"✅ Enriched {len(enriched)} courses in {elapsed:.1f}s "
+          f"({stats['fetched']} fetched, {stats['revalidated']} unchanged, {failures} failed).")
+
+
+if __name__ == "__main__":
+    main()
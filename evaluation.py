@@ -1,7 +1,5 @@
-import json
 import numpy as np
-from sklearn.metrics import average_precision_score
-from app4 import embed_text, recommend_assessments  # Make sure these are imported properly
+from recommender import recommend_for_query
 
 # 🔧 Benchmark data — mock examples (replace these with your real test cases)
 benchmark = [
@@ -38,29 +36,36 @@ def apk(actual, predicted, k=3):
     return score / min(len(actual), k) if actual else 0.0
 
 # 🧪 Evaluation loop
-recalls = []
-maps = []
+def evaluate(benchmark, k=3, recommend=recommend_for_query):
+    recalls = []
+    maps = []
 
-for i, sample in enumerate(benchmark):
-    query = sample["query"]
-    expected = sample["expected_names"]
+    for i, sample in enumerate(benchmark):
+        query = sample["query"]
+        expected = sample["expected_names"]
 
-    recommendations = recommend_assessments(query, top_k=3)
-    predicted_names = [rec["Assessment Name"] for rec in recommendations]
+        recommendations = recommend(query, top_k=k)
+        predicted_names = [rec["name"] for rec in recommendations]
 
-    rec = recall_at_k(predicted_names, expected)
-    m = apk(expected, predicted_names)
+        rec = recall_at_k(predicted_names, expected, k)
+        m = apk(expected, predicted_names, k)
 
-    recalls.append(rec)
-    maps.append(m)
+        recalls.append(rec)
+        maps.append(m)
 
-    print(f"\nQuery {i+1}:")
-    print("Query Text:", query)
-    print("Expected:", expected)
-    print("Predicted:", predicted_names)
-    print(f"Recall@3: {rec:.3f}, MAP@3: {m:.3f}")
+        print(f"\nQuery {i+1}:")
+        print("Query Text:", query)
+        print("Expected:", expected)
+        print("Predicted:", predicted_names)
+        print(f"Recall@{k}: {rec:.3f}, MAP@{k}: {m:.3f}")
 
-# 📈 Final Results
-print("\n========== Overall Evaluation ==========")
-print(f"Mean Recall@3: {np.mean(recalls):.3f}")
-print(f"Mean MAP@3: {np.mean(maps):.3f}")
+    return float(np.mean(recalls)), float(np.mean(maps))
+
+
+if __name__ == "__main__":
+    mean_recall, mean_map = evaluate(benchmark)
+
+    # 📈 Final Results
+    print("\n========== Overall Evaluation ==========")
+    print(f"Mean Recall@3: {mean_recall:.3f}")
+    print(f"Mean MAP@3: {mean_map:.3f}")
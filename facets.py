@@ -0,0 +1,101 @@
+import re
+
+import numpy as np
+
+# Assessment type codes used in the catalog "keys" column
+KEY_CODES = ("A", "B", "C", "D", "E", "K", "P", "S", "T")
+
+
+# Upper bound in minutes of a duration such as "30 minutes" or "20-30 minutes",
+# 0 when it cannot be parsed so the item always passes duration filters
+def parse_duration_minutes(duration_text):
+    duration_match = re.search(r'(\d+)(?:\s*-\s*(\d+))?', duration_text or "")
+    if not duration_match:
+        return 0
+    return int(duration_match.group(2) or duration_match.group(1))
+
+
+# Columnar copy of the catalog facets with one boolean mask per facet value,
+# so filters become mask intersections ahead of top-k selection
+class FacetIndex:
+    def __init__(self, catalog_data):
+        self.size = len(catalog_data)
+        self.duration_minutes = np.array(
+            [parse_duration_minutes(item.get("duration")) for item in catalog_data], dtype=np.int32
+        )
+        self.masks = {
+            "test_type": self._value_masks([item.get("test_type") for item in catalog_data]),
+            "adaptive_support": self._value_masks([item.get("adaptive_support") for item in catalog_data]),
+            "remote_testing": self._value_masks([item.get("remote_testing") for item in catalog_data]),
+            "keys": {
+                code: np.array([code in item.get("keys", ()) for item in catalog_data], dtype=bool)
+                for code in sorted(set(KEY_CODES).union(*[item.get("keys", ()) for item in catalog_data]))
+            }
+        }
+
+    # Arrays and metadata that fully describe the index. The masks of each
+    # facet are stacked into one matrix with a row per value.
+    def arrays(self):
+        arrays = {"duration_minutes": self.duration_minutes}
+        values = {}
+        for facet, masks in self.masks.items():
+            values[facet] = sorted(masks)
+            arrays[f"facet_{facet}"] = (
+                np.stack([masks[value] for value in values[facet]])
+                if masks else np.zeros((0, self.size), dtype=bool)
+            )
+        return arrays, {"size": self.size, "values": values}
+
+    # Index over the output of arrays(); masks are views into the arrays
+    @classmethod
+    def from_arrays(cls, arrays, metadata):
+        index = cls.__new__(cls)
+        index.size = metadata["size"]
+        index.duration_minutes = arrays["duration_minutes"]
+        index.masks = {
+            facet: {value: arrays[f"facet_{facet}"][row] for row, value in enumerate(values)}
+            for facet, values in metadata["values"].items()
+        }
+        return index
+
+    def _value_masks(self, column):
+        values = np.array(column, dtype=object)
+        return {value: values == value for value in set(column) if value is not None}
+
+    def _empty(self):
+        return np.zeros(self.size, dtype=bool)
+
+    # Items matching any of the given values of one facet
+    def any_of(self, facet, values):
+        mask = self._empty()
+        for value in values:
+            value_mask = self.masks[facet].get(value)
+            if value_mask is not None:
+                mask |= value_mask
+        return mask
+
+    # Mask of items passing every given filter, or None when nothing is filtered.
+    # Values within a facet are OR-ed and facets are AND-ed. As in
+    # process_duration_constraint, a duration limit that would leave nothing
+    # is dropped rather than returning no results.
+    def mask(self, test_type=None, keys=None, adaptive=None, remote=None, max_duration=None):
+        mask = None
+
+        def intersect(current, other):
+            return other if current is None else current & other
+
+        if test_type:
+            mask = intersect(mask, self.any_of("test_type", test_type))
+        if keys:
+            mask = intersect(mask, self.any_of("keys", keys))
+        if adaptive is not None:
+            mask = intersect(mask, self.any_of("adaptive_support", ["Yes" if adaptive else "No"]))
+        if remote is not None:
+            mask = intersect(mask, self.any_of("remote_testing", ["Yes" if remote else "No"]))
+        if max_duration is not None:
+            duration_mask = self.duration_minutes <= max_duration
+            with_duration = intersect(mask, duration_mask)
+            if with_duration.any():
+                mask = with_duration
+
+        return mask
@@ -0,0 +1,95 @@
+import json
+import os
+from collections.abc import Sequence
+
+import numpy as np
+
+# Single-file container for a prebuilt index: a JSON header followed by raw
+# array bytes. Readers memory-map the file read-only, so every process that
+# opens the same file shares its pages through the OS page cache.
+MAGIC = b"SHLIDX1\0"
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+# Write named arrays and JSON-serialisable metadata to path atomically
+def write_index_file(path, arrays, metadata):
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    specs = {}
+    size = 0
+    for name, array in arrays.items():
+        specs[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": size}
+        size = _aligned(size + array.nbytes)
+    header = json.dumps({"metadata": metadata, "arrays": specs}).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    # Per-process temp name: several workers may build the same file at once
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + specs[name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + size)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Read-only arrays backed by one shared mapping of path, and the metadata
+def read_index_file(path):
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an index file")
+        header_length = int.from_bytes(f.read(8), "little")
+        header = json.loads(f.read(header_length))
+    data_start = _aligned(len(MAGIC) + 8 + header_length)
+
+    buffer = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        count = int(np.prod(shape))
+        if count == 0:
+            arrays[name] = np.empty(shape, dtype=dtype)
+            continue
+        arrays[name] = np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + spec["offset"]
+        ).reshape(shape)
+    return arrays, header["metadata"]
+
+
+# Encode records as JSON into one byte array plus an offsets array, so a
+# mapped file can hold a catalog without every process parsing all of it
+def pack_records(records):
+    encoded = [json.dumps(record, ensure_ascii=False).encode("utf-8") for record in records]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+# Read-only sequence over packed records. Items are decoded on access, so
+# only the records a request touches become Python objects.
+class RecordArray(Sequence):
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("record index out of range")
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return json.loads(self.data[start:end].tobytes())
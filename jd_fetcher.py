@@ -0,0 +1,135 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from cache import TTLCache
+
+# Defaults for job description fetching
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10.0
+MAX_BODY_BYTES = 2 * 1024 * 1024
+POOL_SIZE = 16
+CACHE_SIZE = 512
+CACHE_TTL = 3600.0
+
+
+# Page elements that hold navigation, scripts or site chrome, never the posting
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form", "iframe"]
+
+
+# Pull the job description out of a fetched page
+def extract_job_description(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    # Extract main content - adjust based on typical JD sites
+    main_content = soup.find('div', class_='job-description') or soup.find('div', class_='description')
+    if main_content:
+        return main_content.text.strip()
+    # Otherwise the page text without chrome, one line per block element
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    content = soup.find('main') or soup.find('article') or soup
+    return content.get_text("\n", strip=True)
+
+
+# Fetches job description pages over a shared connection pool. Extracted text
+# is cached per URL, and concurrent async requests for the same URL share one
+# in-flight fetch.
+class JobDescriptionFetcher:
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_bytes=MAX_BODY_BYTES, pool_size=POOL_SIZE,
+                 cache_size=CACHE_SIZE, cache_ttl=CACHE_TTL):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_bytes = max_bytes
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="jd-fetch")
+
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        self.failures = 0
+
+    # Download a page, reading at most max_bytes of the body
+    def download(self, url):
+        with self.session.get(url, timeout=self.timeout, stream=True) as response:
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_bytes:
+                    break
+            body = b"".join(chunks)[:self.max_bytes]
+            encoding = response.encoding or response.apparent_encoding or "utf-8"
+        return body.decode(encoding, errors="replace")
+
+    # Blocking fetch with caching, for callers outside the event loop
+    def fetch_sync(self, url):
+        text = self.cache.get(url)
+        if text is not None:
+            return text
+        return self._fetch_uncached(url)
+
+    # Non-blocking fetch; the download and parsing run on the fetch pool
+    async def fetch(self, url):
+        text = self.cache.get(url)
+        if text is not None:
+            return text
+
+        # Single flight: later callers await the download already in progress
+        with self._in_flight_lock:
+            future = self._in_flight.get(url)
+            started = future is None
+            if started:
+                future = self.executor.submit(self._fetch_uncached, url)
+                self._in_flight[url] = future
+        # A finished future runs the callback at once in this thread, so it
+        # is registered only after the lock is released
+        if started:
+            future.add_done_callback(lambda done: self._forget(url, done))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _forget(self, url, future):
+        with self._in_flight_lock:
+            if self._in_flight.get(url) is future:
+                del self._in_flight[url]
+
+    def _fetch_uncached(self, url):
+        try:
+            text = extract_job_description(self.download(url))
+        except Exception:
+            self.failures += 1
+            raise
+        self.cache.set(url, text)
+        return text
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats["failures"] = self.failures
+        stats["in_flight"] = len(self._in_flight)
+        return stats
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+# Process-wide fetcher shared by the API and the Streamlit app
+def get_fetcher():
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            _fetcher = JobDescriptionFetcher()
+        return _fetcher
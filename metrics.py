@@ -0,0 +1,166 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+# Cumulative histogram with one series per label combination
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = {key: dict(series, counts=list(series["counts"])) for key, series in self._series.items()}
+        lines = []
+        for key, series in sorted(snapshot.items()):
+            labels = dict(key)
+            for bound, count in zip(self.buckets, series["counts"]):
+                lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{self.name}_bucket{format_labels({**labels, 'le': '+Inf'})} {series['count']}")
+            lines.append(f"{self.name}_sum{format_labels(labels)} {series['sum']}")
+            lines.append(f"{self.name}_count{format_labels(labels)} {series['count']}")
+        return lines
+
+
+# Monotonic counter with one value per label combination
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{format_labels(dict(key))} {value}" for key, value in sorted(values.items())]
+
+
+# Metric whose samples are read from application state at scrape time
+class Callback:
+    def __init__(self, name, documentation, type, collect):
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.collect = collect
+
+    def samples(self):
+        return [f"{self.name}{format_labels(labels)} {value}" for labels, value in self.collect()]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    # Prometheus text exposition format
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+STAGE_SECONDS = registry.register(Histogram(
+    "shl_stage_duration_seconds", "Time spent in each stage of the recommend pipeline"
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "shl_request_duration_seconds", "HTTP request latency by route"
+))
+
+# Stage timings of the current request when profiling was requested
+_profile = contextvars.ContextVar("shl_profile", default=None)
+
+
+# Start collecting a stage breakdown for the current request
+def start_profile():
+    profile = []
+    _profile.set(profile)
+    return profile
+
+
+# Note an event, such as a cache hit, in the current request's profile
+def annotate(name, description):
+    profile = _profile.get()
+    if profile is not None:
+        profile.append((name, None, description))
+
+
+# Add entries recorded in another context, such as a scoring batch, to the
+# current request's profile
+def extend_profile(entries):
+    profile = _profile.get()
+    if profile is not None:
+        profile.extend(entries)
+
+
+# Time a pipeline stage into the stage histogram and the active profile
+@contextmanager
+def stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        profile = _profile.get()
+        if profile is not None:
+            profile.append((name, elapsed, None))
+
+
+# Server-Timing header value for a profile, durations in milliseconds
+def server_timing(profile, total_seconds=None):
+    entries = []
+    for name, elapsed, description in profile:
+        entry = name
+        if description is not None:
+            entry += f';desc="{description}"'
+        if elapsed is not None:
+            entry += f";dur={elapsed * 1000:.3f}"
+        entries.append(entry)
+    if total_seconds is not None:
+        entries.append(f"total;dur={total_seconds * 1000:.3f}")
+    return ", ".join(entries)
@@ -0,0 +1,961 @@
+import os
+import re
+import json
+import pickle
+import hashlib
+import logging
+import threading
+import numpy as np
+from cache import TTLCache
+from condense import MAX_SCAN_CHARS, WORD_RE, condense_text
+from dedup import COLLAPSE_VARIANTS, collapse_variants, version_salt
+from diversity import DIVERSIFY_POOL_FACTOR, ItemGraph
+from facets import FacetIndex
+from index_file import RecordArray, pack_records, read_index_file, write_index_file
+from metrics import annotate, stage
+from retrieval import InvertedIndex, select_top_k
+from suggest import SUGGEST_LIMIT, SuggestIndex
+
+# Recommender core shared by the API, the Streamlit UI and offline tools.
+# Heavy dependencies (scikit-learn, scipy, the embedding and ANN modules,
+# the HTTP fetcher) are imported where they are first needed, so importing
+# this module stays cheap.
+
+logger = logging.getLogger(__name__)
+
+# Catalog source and the directory where fitted indexes are persisted
+CATALOG_FILE = "shl_courses2.json"
+INDEX_DIR = "index_cache"
+# SQLite catalog database written by catalog_db.py, used by the "sql" method
+CATALOG_DB = os.environ.get("SHL_CATALOG_DB", "catalog.db")
+# Bumped whenever the pickled index layout changes
+INDEX_FORMAT = 8
+# Share of changed courses above which a catalog update refits the index
+INCREMENTAL_UPDATE_LIMIT = 0.1
+# Seconds between checks of the catalog file for changes, 0 disables polling
+CATALOG_POLL_INTERVAL = float(os.environ.get("SHL_CATALOG_POLL_SECONDS", "30"))
+# Size and lifetime of the recommendation result cache
+RESULT_CACHE_SIZE = 2048
+RESULT_CACHE_TTL = 600.0
+# Scoring used when a request does not pick one: "tfidf", "embedding",
+# "ann" (approximate nearest neighbours over the embeddings) or "sql" (the
+# SQLite catalog database, without loading the in-memory index)
+RETRIEVAL_METHOD = os.environ.get("SHL_RETRIEVAL_METHOD", "tfidf")
+
+# Create the TF-IDF vectorizer used to build the recommender index
+def get_vectorizer():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    
+    return TfidfVectorizer(
+        max_features=5000,
+        stop_words='english'
+    )
+
+# Process the JSON data to match the expected format
+def process_json_data(json_data):
+    processed_data = []
+    
+    for item in json_data:
+        # Fields added by enrich.py are used when present
+        remote_testing = item.get("remote_testing")
+        adaptive = item.get("adaptive_irt")
+        if adaptive is None:
+            adaptive = any(key in ("A", "IRT") for key in item.get("keys", []))
+        duration_minutes = item.get("duration_minutes")
+        
+        # Extract the relevant fields from the new JSON format
+        processed_item = {
+            "course_id": item.get("course_id"),
+            "name": item.get("course_name", "Unknown"),
+            "url": item.get("course_url", "#"),
+            # Default values for fields not in the JSON
+            "remote_testing": "No" if remote_testing is False else "Yes",  # Default value
+            "adaptive_support": "Yes" if adaptive else "No",
+            "duration": f"{duration_minutes} minutes" if duration_minutes else "30 minutes",  # Default value
+            "test_type": get_test_type(item.get("keys", [])),
+            "description": item.get("description") or f"SHL assessment: {item.get('course_name', 'Unknown')}",  # Generate a basic description
+            "keys": item.get("keys", [])
+        }
+        processed_data.append(processed_item)
+    
+    return processed_data
+
+# Determine test type based on keys
+def get_test_type(keys):
+    if not isinstance(keys, list):
+        return "Unknown"
+    
+    if "C" in keys:
+        return "Cognitive"
+    elif "P" in keys:
+        return "Personality"
+    elif "S" in keys or "T" in keys:
+        return "Skill-based"
+    else:
+        return "Other"
+
+# Compute the content hash that versions a catalog and its index
+def catalog_version(raw_bytes, collapse=COLLAPSE_VARIANTS):
+    return hashlib.sha256((version_salt() if collapse else b"") + raw_bytes).hexdigest()[:16]
+
+# Modification time of the catalog file, None when it is missing
+def catalog_mtime(json_file=CATALOG_FILE):
+    try:
+        return os.stat(json_file).st_mtime_ns
+    except OSError:
+        return None
+
+# Version of a catalog file computed from its bytes without parsing it,
+# None when the file cannot be read
+def catalog_file_version(json_file=CATALOG_FILE, collapse=COLLAPSE_VARIANTS):
+    digest = hashlib.sha256(version_salt() if collapse else b"")
+    try:
+        with open(json_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()[:16]
+
+# Load SHL catalog from JSON file together with its version. Near-duplicate
+# variants are collapsed into one item each unless collapse is off.
+def load_catalog(json_file=CATALOG_FILE, fallback=True, collapse=COLLAPSE_VARIANTS):
+    # Check if JSON file exists
+    if os.path.exists(json_file) or not fallback:
+        try:
+            with open(json_file, 'rb') as f:
+                raw = f.read()
+            # Process the JSON data to match the expected format
+            catalog_data = process_json_data(json.loads(raw))
+            if collapse:
+                size = len(catalog_data)
+                catalog_data = collapse_variants(catalog_data)
+                logger.info("Collapsed %d catalog items into %d", size, len(catalog_data))
+            return catalog_data, catalog_version(raw, collapse)
+        except Exception as e:
+            if not fallback:
+                raise
+            logger.error("Error loading JSON file %s: %s", json_file, e)
+    
+    # If file doesn't exist or is unreadable, use mock data
+    mock_data = get_mock_data()
+    return mock_data, catalog_version(json.dumps(mock_data, sort_keys=True).encode("utf-8"))
+
+# Load SHL catalog from JSON file
+def get_shl_catalog():
+    return get_recommender_index().catalog_data
+
+# Mock data in case JSON file is missing
+def get_mock_data():
+    return [
+        {
+            "name": "SHL Verify Interactive - Numerical Reasoning",
+            "url": "https://www.shl.com/products/verify-interactive-numerical-reasoning/",
+            "remote_testing": "Yes",
+            "adaptive_support": "Yes",
+            "duration": "30 minutes",
+            "test_type": "Cognitive",
+            "description": "Advanced numerical reasoning assessment that measures a candidate's ability to analyze and interpret numerical data. Ideal for roles requiring strong analytical skills."
+        },
+        {
+            "name": "SHL Verify Interactive - Verbal Reasoning",
+            "url": "https://www.shl.com/products/verify-interactive-verbal-reasoning/",
+            "remote_testing": "Yes",
+            "adaptive_support": "Yes",
+            "duration": "30 minutes",
+            "test_type": "Cognitive",
+            "description": "Verbal reasoning assessment that evaluates a candidate's ability to understand and analyze written information. Perfect for roles requiring communication skills."
+        },
+        {
+            "name": "Java Programming Assessment",
+            "url": "https://www.shl.com/products/java-programming-assessment/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "40 minutes",
+            "test_type": "Skill-based",
+            "description": "Technical assessment for Java developers that evaluates coding skills, OOP principles, and problem-solving abilities. Includes hands-on coding exercises."
+        },
+        {
+            "name": "Python Programming Assessment",
+            "url": "https://www.shl.com/products/python-programming-assessment/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "45 minutes",
+            "test_type": "Skill-based",
+            "description": "Technical assessment for Python developers that evaluates data structures, algorithms, and coding skills. Includes data analysis scenarios."
+        },
+        {
+            "name": "SQL Database Skills",
+            "url": "https://www.shl.com/products/sql-database-skills/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "35 minutes",
+            "test_type": "Skill-based",
+            "description": "Assessment for database professionals focusing on SQL queries, database design, and data manipulation. Evaluates practical database skills."
+        },
+        {
+            "name": "SHL Personality Assessment (OPQ)",
+            "url": "https://www.shl.com/products/product-catalog/view/occupational-personality-questionnaire/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "25 minutes",
+            "test_type": "Personality",
+            "description": "Comprehensive personality assessment that measures workplace behaviors and preferences across multiple dimensions. Helps evaluate cultural fit."
+        },
+        {
+            "name": "SHL Cognitive Assessment Package",
+            "url": "https://www.shl.com/products/cognitive-assessment-package/",
+            "remote_testing": "Yes",
+            "adaptive_support": "Yes",
+            "duration": "60 minutes",
+            "test_type": "Cognitive",
+            "description": "Combined package of numerical, verbal, and logical reasoning assessments to evaluate overall cognitive abilities. Comprehensive evaluation for knowledge workers."
+        },
+        {
+            "name": "Customer Service Aptitude",
+            "url": "https://www.shl.com/products/customer-service-aptitude/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "20 minutes",
+            "test_type": "Skill-based",
+            "description": "Measures skills related to customer service including empathy, problem-solving, and communication. Uses situational judgment scenarios."
+        },
+        {
+            "name": "Full-Stack Development Assessment",
+            "url": "https://www.shl.com/products/full-stack-development-assessment/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "50 minutes",
+            "test_type": "Skill-based",
+            "description": "Technical assessment for full-stack developers covering front-end, back-end, and database technologies. Evaluates JavaScript, HTML/CSS, and API development."
+        },
+        {
+            "name": "ADEPT-15 Personality Questionnaire",
+            "url": "https://www.shl.com/products/adept-15/",
+            "remote_testing": "Yes",
+            "adaptive_support": "Yes",
+            "duration": "25 minutes",
+            "test_type": "Personality",
+            "description": "Modern personality assessment measuring 15 key workplace traits that predict job performance. Provides insights into work style and team dynamics."
+        },
+        {
+            "name": "Data Science Assessment",
+            "url": "https://www.shl.com/products/data-science-assessment/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "45 minutes",
+            "test_type": "Skill-based",
+            "description": "Technical assessment for data scientists covering statistics, machine learning, and data manipulation skills. Includes Python and SQL components."
+        },
+        {
+            "name": "SHL Verify Mechanical Reasoning",
+            "url": "https://www.shl.com/products/verify-mechanical-reasoning/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "25 minutes",
+            "test_type": "Cognitive",
+            "description": "Assessment measuring understanding of mechanical principles and physical concepts. Ideal for engineering and technical roles."
+        },
+        {
+            "name": "Leadership Assessment",
+            "url": "https://www.shl.com/products/leadership-assessment/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "35 minutes",
+            "test_type": "Personality",
+            "description": "Evaluates leadership potential across key dimensions including strategic thinking, people management, and decision-making. Designed for management roles."
+        },
+        {
+            "name": "JavaScript Coding Assessment",
+            "url": "https://www.shl.com/products/javascript-coding-assessment/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "40 minutes",
+            "test_type": "Skill-based",
+            "description": "Technical assessment for front-end developers focusing on JavaScript, DOM manipulation, and modern frameworks. Includes practical coding exercises."
+        },
+        {
+            "name": "Business Analyst Assessment",
+            "url": "https://www.shl.com/products/business-analyst-assessment/",
+            "remote_testing": "Yes",
+            "adaptive_support": "No",
+            "duration": "45 minutes",
+            "test_type": "Skill-based",
+            "description": "Evaluates skills essential for business analysts including requirements gathering, process mapping, and stakeholder management."
+        }
+    ]
+
+# Function to fetch JD from URL
+def fetch_job_description(url):
+    from jd_fetcher import get_fetcher
+    
+    try:
+        with stage("fetch"):
+            return get_fetcher().fetch_sync(url)
+    except Exception as e:
+        logger.warning("Error fetching job description from %s: %s", url, e)
+        return ""
+
+# Function to preprocess text
+def preprocess_text(text):
+    # Keep word runs only, dropping special characters and extra whitespace,
+    # in one pass of a compiled pattern
+    return " ".join(WORD_RE.findall(text)).lower()
+
+# Bound the size of a query: long text such as a fetched job description is
+# reduced to its key phrases, weighted towards terms the catalog knows
+def condense_query(query, index):
+    with stage("condense"):
+        return condense_text(query, vocabulary=index.vocabulary)
+
+# Text of a catalog item as seen by the vectorizer
+def assessment_text(item):
+    return preprocess_text(f"{item['name']} {item.get('description', '')}")
+
+# Stable identity of a catalog item across catalog versions
+def item_key(item):
+    return item.get("course_id") or item["url"]
+
+# TF-IDF index over the catalog, fitted once per catalog version, with the
+# facet masks, the name typeahead and the item similarity graph built
+# alongside it
+class RecommenderIndex:
+    def __init__(self, catalog_data, version, vectorizer, matrix, postings=None, facets=None, suggestions=None,
+                 graph=None):
+        self.catalog_data = catalog_data
+        self.version = version
+        self.vectorizer = vectorizer
+        self.matrix = matrix
+        self.postings = postings or InvertedIndex(matrix)
+        self.facets = facets or FacetIndex(catalog_data)
+        self.suggestions = suggestions or SuggestIndex(catalog_data)
+        self.graph = graph or ItemGraph.build(matrix)
+
+    def __len__(self):
+        return len(self.catalog_data)
+
+    @property
+    def vocabulary(self):
+        return self.vectorizer.vocabulary_
+
+    @classmethod
+    def build(cls, catalog_data, version):
+        vectorizer = get_vectorizer()
+        matrix = vectorizer.fit_transform([assessment_text(item) for item in catalog_data])
+        # Terms cut by max_features are only kept for introspection
+        if hasattr(vectorizer, "stop_words_"):
+            del vectorizer.stop_words_
+        return cls(catalog_data, version, vectorizer, matrix.tocsr())
+
+    # Index for a new catalog version that reuses the rows of unchanged courses.
+    # New and edited courses are vectorized with the existing vocabulary and
+    # IDF, so this is a stopgap until a full refit (see reload_catalog).
+    # Returns None when too much changed, or when a changed course has terms
+    # the vocabulary lacks and would not be found at all.
+    def update(self, catalog_data, version, limit=INCREMENTAL_UPDATE_LIMIT):
+        old_rows = {item_key(item): row for row, item in enumerate(self.catalog_data)}
+        reused_rows, reused_positions, changed_positions = [], [], []
+        for position, item in enumerate(catalog_data):
+            row = old_rows.get(item_key(item))
+            if row is not None and self.catalog_data[row] == item:
+                reused_rows.append(row)
+                reused_positions.append(position)
+            else:
+                changed_positions.append(position)
+        
+        removed = len(self.catalog_data) - len(reused_rows)
+        if len(changed_positions) + removed > limit * max(len(catalog_data), 1):
+            return None
+        
+        import scipy.sparse as sp
+        
+        changed_texts = [assessment_text(catalog_data[p]) for p in changed_positions]
+        analyzer = self.vectorizer.build_analyzer()
+        vocabulary = self.vocabulary
+        if any(term not in vocabulary for text in changed_texts for term in analyzer(text)):
+            return None
+        
+        parts = [self.matrix[reused_rows]]
+        if changed_positions:
+            parts.append(self.transform(changed_texts))
+        stacked = sp.vstack(parts, format="csr")
+        
+        # Put the stacked rows back into catalog order
+        order = np.empty(len(catalog_data), dtype=np.int64)
+        order[reused_positions + changed_positions] = np.arange(len(catalog_data))
+        return RecommenderIndex(catalog_data, version, self.vectorizer, stacked[order])
+
+    # Vectorize an already preprocessed query with the fitted vocabulary
+    def transform(self, queries):
+        return self.vectorizer.transform(queries)
+
+    # Cosine similarity of a single query against every catalog item
+    def score(self, query):
+        from sklearn.metrics.pairwise import cosine_similarity
+        
+        return cosine_similarity(self.transform([query]), self.matrix)[0]
+
+    # Top-k (doc ids, scores) for a single query among the allowed items,
+    # padded to top_k with zero-score items when fewer share a query term
+    def search(self, query, top_k, allowed=None):
+        with stage("vectorize"):
+            query_vector = self.transform([query])
+        with stage("similarity"):
+            doc_ids, scores = self.postings.search(query_vector, top_k, allowed=allowed)
+            return self.pad_top_k(doc_ids, scores, top_k, allowed=allowed)
+
+    # Typeahead suggestions of assessment names for a partly typed query
+    def suggest(self, prefix, limit=SUGGEST_LIMIT):
+        return self.suggestions.suggest(prefix, limit)
+
+    def pad_top_k(self, doc_ids, scores, top_k, allowed=None):
+        candidates = np.arange(len(self.catalog_data)) if allowed is None else np.flatnonzero(allowed)
+        missing = min(top_k, len(candidates)) - len(doc_ids)
+        if missing <= 0:
+            return doc_ids, scores
+        filler = np.setdiff1d(candidates[:top_k + len(doc_ids)], doc_ids)[:missing]
+        return np.concatenate([doc_ids, filler]), np.concatenate([scores, np.zeros(len(filler))])
+
+    # Write the index as one memory-mappable file: the CSR matrix, the
+    # postings, the facet masks, the typeahead and the similarity graph as
+    # raw arrays, next to the catalog and the fitted vectorizer
+    def save(self, path):
+        facet_arrays, facet_metadata = self.facets.arrays()
+        catalog_bytes, catalog_offsets = pack_records(self.catalog_data)
+        arrays = {
+            "matrix_data": self.matrix.data,
+            "matrix_indices": self.matrix.indices,
+            "matrix_indptr": self.matrix.indptr,
+            **{f"postings_{name}": array for name, array in self.postings.arrays().items()},
+            **facet_arrays,
+            **self.suggestions.arrays(),
+            **{f"graph_{name}": array for name, array in self.graph.arrays().items()},
+            "catalog": catalog_bytes,
+            "catalog_offsets": catalog_offsets,
+            "vectorizer": np.frombuffer(pickle.dumps(self.vectorizer, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+        }
+        metadata = {
+            "format": INDEX_FORMAT,
+            "version": self.version,
+            "shape": list(self.matrix.shape),
+            "facets": facet_metadata
+        }
+        write_index_file(path, arrays, metadata)
+
+    # Open an index file read-only. The arrays stay memory-mapped, so worker
+    # processes that load the same file share one copy in RAM, and catalog
+    # items are only decoded when a request reads them.
+    @classmethod
+    def load(cls, path):
+        import scipy.sparse as sp
+        
+        arrays, metadata = read_index_file(path)
+        if metadata["format"] != INDEX_FORMAT:
+            raise ValueError(f"{path} has index format {metadata['format']}, expected {INDEX_FORMAT}")
+        matrix = sp.csr_matrix(
+            (arrays["matrix_data"], arrays["matrix_indices"], arrays["matrix_indptr"]),
+            shape=tuple(metadata["shape"]),
+            copy=False
+        )
+        postings = InvertedIndex.from_arrays(
+            {name[len("postings_"):]: array for name, array in arrays.items() if name.startswith("postings_")},
+            n_docs=matrix.shape[0]
+        )
+        return cls(
+            RecordArray(arrays["catalog"], arrays["catalog_offsets"]),
+            metadata["version"],
+            pickle.loads(arrays["vectorizer"].tobytes()),
+            matrix,
+            postings=postings,
+            facets=FacetIndex.from_arrays(arrays, metadata["facets"]),
+            suggestions=SuggestIndex.from_arrays(arrays),
+            graph=ItemGraph.from_arrays({name[len("graph_"):]: array for name, array in arrays.items() if name.startswith("graph_")})
+        )
+
+# Location of the persisted index for a catalog version
+def index_path(version, index_dir=INDEX_DIR):
+    return os.path.join(index_dir, f"tfidf-{version}-v{INDEX_FORMAT}.idx")
+
+# Saved index for a catalog version, None when there is no readable one
+def open_index(version, index_dir=INDEX_DIR):
+    path = index_path(version, index_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        index = RecommenderIndex.load(path)
+    except Exception:
+        return None
+    return index if index.version == version else None
+
+# Load the index for this catalog version from disk, or fit it from scratch.
+# Only full fits are saved, so a version's index file does not depend on
+# how the catalog got there.
+def load_or_build_index(catalog_data, version, index_dir=INDEX_DIR):
+    index = open_index(version, index_dir)
+    if index is not None and len(index.catalog_data) == len(catalog_data):
+        return index
+    
+    index = RecommenderIndex.build(catalog_data, version)
+    try:
+        os.makedirs(index_dir, exist_ok=True)
+        index.save(index_path(version, index_dir))
+    except OSError:
+        # A read-only deployment still works, it just refits on restart
+        return index
+    # Serve from the mapped file so pre-forked workers share its pages
+    return open_index(version, index_dir) or index
+
+result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+_index_lock = threading.Lock()
+_indexes = {}
+_catalog_mtimes = {}
+
+# Get the recommender index for the catalog file, fitting it at most once per version.
+# Readers never take the lock once an index is loaded; reloads replace the
+# reference, so in-flight requests finish on the index they started with.
+def get_recommender_index(json_file=CATALOG_FILE):
+    index = _indexes.get(json_file)
+    if index is None:
+        with _index_lock:
+            index = _indexes.get(json_file)
+            if index is None:
+                mtime = catalog_mtime(json_file)
+                # A saved index for the file's current content is mapped
+                # without parsing the catalog at all
+                version = catalog_file_version(json_file)
+                index = open_index(version) if version is not None else None
+                if index is None:
+                    catalog_data, version = load_catalog(json_file)
+                    index = load_or_build_index(catalog_data, version)
+                _indexes[json_file] = index
+                _catalog_mtimes[json_file] = mtime
+    return index
+
+# The index serving json_file, or None while it has not been loaded yet
+def loaded_index(json_file=CATALOG_FILE):
+    return _indexes.get(json_file)
+
+_catalog_stores = {}
+
+# Open the SQLite catalog database, reopening it when a new one has been
+# ingested in its place. Only the file is opened; nothing is parsed.
+def get_catalog_store(db_path=CATALOG_DB):
+    from catalog_db import CatalogStore
+    
+    store = _catalog_stores.get(db_path)
+    if store is None or store.replaced():
+        with _index_lock:
+            store = _catalog_stores.get(db_path)
+            if store is None or store.replaced():
+                store = CatalogStore(db_path)
+                _catalog_stores[db_path] = store
+    return store
+
+# Catalog backend that answers a method: the SQLite store for "sql", the
+# in-memory index otherwise
+def query_backend(method=None):
+    if (method or RETRIEVAL_METHOD) == "sql":
+        return get_catalog_store()
+    return get_recommender_index()
+
+# Backend serving the default method, or None while it has not been opened
+def loaded_backend(json_file=CATALOG_FILE):
+    if RETRIEVAL_METHOD == "sql":
+        return _catalog_stores.get(CATALOG_DB)
+    return loaded_index(json_file)
+
+# Re-read the catalog file and swap in a new index if its content changed.
+# When only a few courses changed, an index derived from the current one is
+# served at once while the full refit runs in the background. Returns the
+# current index and whether it was replaced; an unreadable file keeps the
+# old index in service.
+def reload_catalog(json_file=CATALOG_FILE):
+    get_recommender_index(json_file)
+    with _index_lock:
+        current = _indexes[json_file]
+        mtime = catalog_mtime(json_file)
+        version = catalog_file_version(json_file)
+        _catalog_mtimes[json_file] = mtime
+        if version == current.version:
+            return current, False
+        
+        catalog_data, version = load_catalog(json_file, fallback=False)
+        index = open_index(version)
+        if index is None:
+            index = current.update(catalog_data, version)
+            if index is None:
+                index = load_or_build_index(catalog_data, version)
+            else:
+                threading.Thread(
+                    target=refit_index,
+                    args=(catalog_data, version, json_file),
+                    name="index-refit",
+                    daemon=True
+                ).start()
+        install_index(index, json_file)
+    
+    return index, True
+
+# Fit and save the index for a catalog version, then serve it in place of
+# the incremental index reload_catalog installed, unless the catalog has
+# changed again meanwhile
+def refit_index(catalog_data, version, json_file=CATALOG_FILE):
+    try:
+        index = load_or_build_index(catalog_data, version)
+    except Exception:
+        logger.exception("Refitting the index for catalog version %s failed", version)
+        return
+    with _index_lock:
+        current = _indexes.get(json_file)
+        if current is not None and current.version == version:
+            install_index(index, json_file)
+
+# Serve recommendations for json_file from an already built index
+def install_index(index, json_file=CATALOG_FILE):
+    _indexes[json_file] = index
+    result_cache.clear()
+
+# Poll the catalog file and reload it in the background when it changes
+def watch_catalog(stop_event, json_file=CATALOG_FILE, interval=CATALOG_POLL_INTERVAL):
+    while not stop_event.wait(interval):
+        if catalog_mtime(json_file) == _catalog_mtimes.get(json_file):
+            continue
+        try:
+            index, reloaded = reload_catalog(json_file)
+            if reloaded:
+                logger.info("Catalog reloaded, version %s with %d items", index.version, len(index.catalog_data))
+        except Exception:
+            logger.exception("Catalog reload failed, keeping the current index")
+
+def start_catalog_watcher(json_file=CATALOG_FILE, interval=CATALOG_POLL_INTERVAL):
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=watch_catalog,
+        args=(stop_event, json_file, interval),
+        name="catalog-watcher",
+        daemon=True
+    )
+    thread.start()
+    return stop_event
+
+# Function to get recommendations using TF-IDF and cosine similarity. With a
+# diversity weight, a larger pool is ranked and then re-ranked by maximal
+# marginal relevance over the precomputed item graph.
+def get_recommendations(query, catalog_data, top_k=10, index=None, filters=None, method=None,
+                        probes=None, candidates=None, diversity=None, preprocessed=False):
+    if index is None:
+        index = get_recommender_index()
+    if index.catalog_data is not catalog_data:
+        # Ad-hoc catalogs that are not the loaded one get their own index
+        index = RecommenderIndex.build(catalog_data, version=None)
+    
+    # Preprocess query, unless prepare_request already has
+    if not preprocessed:
+        query = condense_query(query, index)
+        with stage("preprocess"):
+            query = preprocess_text(query)
+    
+    # Facet filters narrow the candidates before ranking
+    with stage("filter"):
+        allowed = index.facets.mask(**filters) if filters else None
+    
+    method = method or RETRIEVAL_METHOD
+    pool_k = top_k if diversity is None else top_k * DIVERSIFY_POOL_FACTOR
+    top_indices = query_vector = None
+    if method == "ann":
+        from ann import ANN_CANDIDATES, ANN_PROBES
+        
+        # Probe the closest IVF lists and re-rank their best members exactly
+        store = get_vector_store(index)
+        ann_index = get_ann_index(index)
+        with stage("vectorize"):
+            query_vector = store.embedder.embed([query])[0]
+        with stage("similarity"):
+            top_indices, scores = ann_index.search(
+                query_vector,
+                pool_k,
+                probes=probes or ANN_PROBES,
+                candidates=candidates or ANN_CANDIDATES,
+                allowed=allowed
+            )
+        if len(top_indices) < pool_k:
+            # The probed lists can hold fewer than pool_k items, or fewer
+            # that pass the filters; score exactly instead
+            top_indices = None
+    
+    if method in ("embedding", "ann") and top_indices is None:
+        # One dot product against the memory-mapped catalog embeddings
+        store = get_vector_store(index)
+        if query_vector is None:
+            with stage("vectorize"):
+                query_vector = store.embedder.embed([query])[0]
+        with stage("similarity"):
+            similarities = store.score_vector(query_vector)
+            allowed_ids = np.arange(len(catalog_data)) if allowed is None else np.flatnonzero(allowed)
+            top_indices, scores = select_top_k(allowed_ids, similarities[allowed_ids], pool_k)
+    elif top_indices is None:
+        # Retrieve the top k from the postings of the query terms
+        top_indices, scores = index.search(query, pool_k, allowed=allowed)
+    
+    if diversity is not None:
+        with stage("diversify"):
+            top_indices, scores = index.graph.rerank(top_indices, scores, top_k, diversity)
+    
+    return [format_recommendation(catalog_data[idx], score) for idx, score in zip(top_indices, scores)]
+
+_vector_stores = {}
+_vector_store_lock = threading.Lock()
+
+# Embedding store for an index, built on first use and cached per catalog
+# version. base_dir overrides where stores are kept (see load_or_build_store).
+def get_vector_store(index, embedder=None, base_dir=None):
+    from embeddings import EMBEDDINGS_DIR, get_embedder, load_or_build_store, text_hash
+    
+    embedder = embedder or get_embedder()
+    texts = None
+    version = index.version
+    if version is None:
+        texts = [assessment_text(item) for item in index.catalog_data]
+        version = "adhoc-" + text_hash("\n".join(texts))[:16]
+    
+    key = (version, embedder.name)
+    store = _vector_stores.get(key)
+    if store is None:
+        # Concurrent first requests wait for one build instead of each
+        # embedding the catalog
+        with _vector_store_lock:
+            store = _vector_stores.get(key)
+            if store is None:
+                if texts is None:
+                    texts = [assessment_text(item) for item in index.catalog_data]
+                store = load_or_build_store(version, texts, embedder, base_dir=base_dir or EMBEDDINGS_DIR)
+                _vector_stores[key] = store
+    return store
+
+_ann_indexes = {}
+_ann_lock = threading.Lock()
+
+# IVF index over the embedding store of an index, built once per catalog version
+def get_ann_index(index, embedder=None):
+    from ann import IVFIndex
+    
+    store = get_vector_store(index, embedder)
+    ann_index = _ann_indexes.get(id(store))
+    if ann_index is None or ann_index.vectors is not store.matrix:
+        with _ann_lock:
+            ann_index = _ann_indexes.get(id(store))
+            if ann_index is None or ann_index.vectors is not store.matrix:
+                ann_index = IVFIndex(store.matrix)
+                _ann_indexes[id(store)] = ann_index
+    return ann_index
+
+# Build the API representation of a scored catalog item
+def format_recommendation(item, score):
+    return {
+        "name": item["name"],
+        "url": item["url"],
+        "remote_testing": item["remote_testing"],
+        "adaptive_support": item["adaptive_support"],
+        "duration": item["duration"],
+        "test_type": item["test_type"],
+        "score": float(score),
+        # Near-duplicates folded into this item, see dedup.py
+        "variants": item.get("variants", [])
+    }
+
+# Recommendations from the SQLite catalog: candidates are matched and
+# facet-filtered in SQL, then re-ranked
+def get_sql_recommendations(query, top_k=10, filters=None, store=None, preprocessed=False):
+    store = store or get_catalog_store()
+    if not preprocessed:
+        with stage("preprocess"):
+            query = preprocess_text(query)
+    with stage("similarity"):
+        rows, scores = store.search(query, top_k, filters)
+    return [format_recommendation(row, score) for row, score in zip(rows, scores)]
+
+# Score many queries against the catalog with one sparse matrix product
+def get_batch_recommendations(queries, catalog_data, top_ks, index=None, filters=None, preprocessed=False):
+    if index is None:
+        index = get_recommender_index()
+    if index.catalog_data is not catalog_data:
+        index = RecommenderIndex.build(catalog_data, version=None)
+    
+    if not preprocessed:
+        with stage("preprocess"):
+            queries = [preprocess_text(condense_query(query, index)) for query in queries]
+    with stage("vectorize"):
+        query_vectors = index.transform(queries)
+    # Rows are L2-normalised, so the dot product is the cosine similarity
+    with stage("similarity"):
+        similarities = (query_vectors @ index.matrix.T).tocsr()
+    
+    results = []
+    for row, top_k in enumerate(top_ks):
+        start, end = similarities.indptr[row], similarities.indptr[row + 1]
+        columns, scores = similarities.indices[start:end], similarities.data[start:end]
+        
+        allowed = index.facets.mask(**filters[row]) if filters and filters[row] else None
+        if allowed is not None:
+            keep = allowed[columns]
+            columns, scores = columns[keep], scores[keep]
+        
+        top_indices, scores = select_top_k(columns, scores, top_k)
+        top_indices, scores = index.pad_top_k(top_indices, scores, top_k, allowed=allowed)
+        results.append([
+            format_recommendation(catalog_data[idx], score)
+            for idx, score in zip(top_indices, scores)
+        ])
+    
+    return results
+
+MINUTES_RE = re.compile(r'(\d+)\s*minutes', re.IGNORECASE)
+
+# Extract the time limit in minutes stated in a query, if any. Like
+# condensing, only the head of a long query is read, so a fetched page
+# costs about the same as a short one.
+def extract_max_minutes(query):
+    time_constraint = MINUTES_RE.search(query[:MAX_SCAN_CHARS])
+    return int(time_constraint.group(1)) if time_constraint else None
+
+# Process duration constraints from query
+def process_duration_constraint(query, recommendations):
+    # Look for time constraints in query
+    max_minutes = extract_max_minutes(query)
+    
+    if max_minutes is not None:
+        return filter_by_duration(recommendations, max_minutes)
+    
+    return recommendations
+
+# Keep recommendations that fit within max_minutes
+def filter_by_duration(recommendations, max_minutes):
+    filtered_recommendations = []
+    
+    for rec in recommendations:
+        # Check if duration is below constraint
+        duration_text = rec['duration'].lower()
+        
+        # Handle ranges like "20-30 minutes"
+        duration_match = re.search(r'(\d+)(?:\s*-\s*(\d+))?', duration_text)
+        
+        if duration_match:
+            if duration_match.group(2):  # Range case
+                max_duration = int(duration_match.group(2))
+            else:  # Single value case
+                max_duration = int(duration_match.group(1))
+            
+            if max_duration <= max_minutes:
+                filtered_recommendations.append(rec)
+        else:
+            # If we can't parse duration, include it anyway
+            filtered_recommendations.append(rec)
+    
+    if filtered_recommendations:
+        return filtered_recommendations
+    
+    return recommendations
+
+# Facet filters for a query; a time limit stated in the query text applies
+# unless an explicit max_duration was given
+def query_filters(query, filters=None):
+    filters = {name: value for name, value in (filters or {}).items() if value is not None}
+    if "max_duration" not in filters:
+        max_minutes = extract_max_minutes(query)
+        if max_minutes is not None:
+            filters["max_duration"] = max_minutes
+    return filters
+
+# Hashable form of a filters dict for cache keys
+def filters_key(filters):
+    return tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in filters.items()
+    ))
+
+# Result cache key of a query against a backend, with the condensed and
+# preprocessed query and its effective filters and method. Filters are read
+# from the uncondensed text, so a time limit survives condensing.
+def result_key(index, query, top_k, filters=None, method=None, probes=None, candidates=None, diversity=None):
+    filters = query_filters(query, filters)
+    method = method or RETRIEVAL_METHOD
+    query = condense_query(query, index)
+    with stage("preprocess"):
+        query = preprocess_text(query)
+    key = (index.version, method, probes, candidates, diversity, query, top_k, filters_key(filters))
+    return key, query, filters, method
+
+# A (query, top_k, filters, method, probes, candidates, diversity) request
+# made ready for the cache and the scorer: (key, backend, request) with the
+# query condensed and preprocessed and the filters and method resolved. A
+# long job description is only condensed here, once per request.
+def prepare_request(query, top_k=10, filters=None, method=None, probes=None, candidates=None, diversity=None):
+    backend = query_backend(method)
+    key, query, filters, method = result_key(backend, query, top_k, filters, method, probes, candidates, diversity)
+    return key, backend, (query, top_k, filters, method, probes, candidates, diversity)
+
+# Cached recommendations for a prepared request, or None when they have to be scored
+def cached_recommendations(prepared):
+    recommendations = result_cache.get(prepared[0])
+    annotate("cache", "miss" if recommendations is None else "hit")
+    # Hand out copies so callers cannot alter cached entries
+    return None if recommendations is None else [dict(rec) for rec in recommendations]
+
+# Score requests made by prepare_request and cache the results. Several
+# TF-IDF queries share one sparse matrix product; a lone one uses the pruned
+# postings search, and other methods and diversified queries score one by
+# one. The in-memory index is only loaded for methods that use it.
+def score_queries(prepared_requests):
+    keys = []
+    scored = {}
+    tfidf = {}
+    for key, backend, (query, top_k, filters, method, probes, candidates, diversity) in prepared_requests:
+        keys.append(key)
+        if key in scored or key in tfidf:
+            continue
+        if method == "sql":
+            if diversity is not None:
+                raise ValueError("Diversified ranking needs the in-memory index, not the sql method")
+            scored[key] = get_sql_recommendations(query, top_k, filters, store=backend, preprocessed=True)
+        elif method == "tfidf" and diversity is None:
+            tfidf[key] = (backend, query, top_k, filters)
+        else:
+            scored[key] = get_recommendations(
+                query, backend.catalog_data, top_k, index=backend, filters=filters,
+                method=method, probes=probes, candidates=candidates, diversity=diversity, preprocessed=True
+            )
+    
+    # Requests prepared against one index version are scored together
+    by_index = {}
+    for key, (index, query, top_k, filters) in tfidf.items():
+        by_index.setdefault(id(index), (index, {}))[1][key] = (query, top_k, filters)
+    for index, requests in by_index.values():
+        if len(requests) == 1:
+            (key, (query, top_k, filters)), = requests.items()
+            scored[key] = get_recommendations(
+                query, index.catalog_data, top_k, index=index, filters=filters, method="tfidf", preprocessed=True
+            )
+        else:
+            queries, top_ks, filters = zip(*requests.values())
+            batch = get_batch_recommendations(
+                list(queries), index.catalog_data, list(top_ks), index=index, filters=list(filters), preprocessed=True
+            )
+            scored.update(zip(requests, batch))
+    
+    for key, recommendations in scored.items():
+        result_cache.set(key, recommendations)
+    return [[dict(rec) for rec in scored[key]] for key in keys]
+
+# Prepare and score (query, top_k, filters, method, probes, candidates,
+# diversity) requests, skipping the result cache lookup
+def score_requests(requests):
+    return score_queries([prepare_request(*request) for request in requests])
+
+# Recommendations for a query with its constraints applied, cached per catalog version
+def recommend_for_query(query, top_k=10, filters=None, method=None, probes=None, candidates=None, diversity=None):
+    prepared = prepare_request(query, top_k, filters, method, probes, candidates, diversity)
+    recommendations = cached_recommendations(prepared)
+    if recommendations is None:
+        recommendations = score_queries([prepared])[0]
+    return recommendations
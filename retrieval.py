@@ -0,0 +1,108 @@
+import numpy as np
+
+
+# Pick the k best (doc_id, score) pairs without fully sorting the candidates
+def select_top_k(doc_ids, scores, k):
+    if k <= 0 or len(scores) == 0:
+        return doc_ids[:0], scores[:0]
+
+    if len(scores) > k:
+        # argpartition is linear; only the k winners get sorted
+        part = np.argpartition(-scores, k - 1)[:k]
+        doc_ids, scores = doc_ids[part], scores[part]
+
+    # Highest score first, lowest doc id first among ties
+    order = np.lexsort((doc_ids, -scores))
+    return doc_ids[order], scores[order]
+
+
+# Term-at-a-time inverted index over an L2-normalised TF-IDF matrix
+class InvertedIndex:
+    def __init__(self, matrix):
+        # CSC gives one sorted postings list (doc ids + weights) per term
+        postings = matrix.tocsc()
+        postings.sort_indices()
+        self.n_docs = matrix.shape[0]
+        self.indptr = postings.indptr
+        self.doc_ids = postings.indices
+        self.weights = postings.data
+
+        # Largest weight in each postings list, used for MaxScore upper bounds
+        self.max_weights = np.zeros(matrix.shape[1], dtype=self.weights.dtype)
+        lengths = np.diff(self.indptr)
+        nonempty = lengths > 0
+        self.max_weights[nonempty] = np.maximum.reduceat(self.weights, self.indptr[:-1][nonempty])
+
+    # Arrays that fully describe the index, for writing to an index file
+    def arrays(self):
+        return {
+            "indptr": self.indptr,
+            "doc_ids": self.doc_ids,
+            "weights": self.weights,
+            "max_weights": self.max_weights
+        }
+
+    # Index over arrays previously returned by arrays(), used as they are
+    # (memory-mapped arrays stay mapped)
+    @classmethod
+    def from_arrays(cls, arrays, n_docs):
+        index = cls.__new__(cls)
+        index.n_docs = n_docs
+        index.indptr = arrays["indptr"]
+        index.doc_ids = arrays["doc_ids"]
+        index.weights = arrays["weights"]
+        index.max_weights = arrays["max_weights"]
+        return index
+
+    def postings(self, term):
+        start, end = self.indptr[term], self.indptr[term + 1]
+        return self.doc_ids[start:end], self.weights[start:end]
+
+    # Top-k documents for a sparse query row, touching only matching postings.
+    # Terms are processed in decreasing order of their score upper bound; once
+    # the current k-th score beats everything the remaining terms could add, no
+    # new document can enter the top-k and later terms only update candidates.
+    def search(self, query_vector, k, allowed=None):
+        if k <= 0:
+            return self.doc_ids[:0], np.empty(0, dtype=np.float64)
+        terms = query_vector.indices
+        query_weights = query_vector.data
+        upper_bounds = query_weights * self.max_weights[terms]
+
+        order = np.argsort(-upper_bounds, kind="stable")
+        terms, query_weights, upper_bounds = terms[order], query_weights[order], upper_bounds[order]
+        remaining = np.concatenate([np.cumsum(upper_bounds[::-1])[::-1], [0.0]])
+
+        acc_docs = np.empty(0, dtype=self.doc_ids.dtype)
+        acc_scores = np.empty(0, dtype=np.float64)
+        for i, term in enumerate(terms):
+            if upper_bounds[i] <= 0:
+                break
+            docs, weights = self.postings(term)
+            if allowed is not None:
+                keep = allowed[docs]
+                docs, weights = docs[keep], weights[keep]
+            contribution = query_weights[i] * weights
+
+            threshold = 0.0
+            if len(acc_scores) >= k:
+                threshold = np.partition(acc_scores, len(acc_scores) - k)[len(acc_scores) - k]
+
+            if len(acc_scores) >= k and threshold >= remaining[i]:
+                # Pruned phase: only existing candidates can still make the top-k
+                alive = acc_scores + remaining[i] >= threshold
+                acc_docs, acc_scores = acc_docs[alive], acc_scores[alive]
+                positions = np.searchsorted(acc_docs, docs)
+                positions[positions == len(acc_docs)] = 0
+                hit = acc_docs[positions] == docs if len(acc_docs) else np.zeros(len(docs), dtype=bool)
+                acc_scores[positions[hit]] += contribution[hit]
+            else:
+                merged_docs, inverse = np.unique(np.concatenate([acc_docs, docs]), return_inverse=True)
+                merged_scores = np.bincount(
+                    inverse,
+                    weights=np.concatenate([acc_scores, contribution]),
+                    minlength=len(merged_docs)
+                )
+                acc_docs, acc_scores = merged_docs, merged_scores
+
+        return select_top_k(acc_docs, acc_scores, k)
@@ -1,62 +1,287 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+import argparse
 import json
+import os
+import textwrap
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse
 
-# Initialize Chrome WebDriver
-options = webdriver.ChromeOptions()
-options.add_argument("--headless")  # Optional: remove if you want browser to be visible
-driver = webdriver.Chrome(options=options)
-
-# Step 1: Open the URL
-driver.get("https://www.shl.com/solutions/products/product-catalog/")
-wait = WebDriverWait(driver, 15)
-
-# Step 2: Click on the Search Button
-search_button_selector = "#Form_FilteringFormJobTitle_action_doFilteringForm > span"
-wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, search_button_selector))).click()
-
-# Initialize storage
-course_list = []
-
-# Step 3 to 8: Scrape table and paginate
-while True:
-    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "table")))
-
-    # Get all rows
-    rows = driver.find_elements(By.CSS_SELECTOR, "table > tbody > tr")
-
-    for row in rows:
-        try:
-            course_id = row.get_attribute("data-course-id")
-            course_name = row.find_element(By.CSS_SELECTOR, "td.custom__table-heading__title > a").text.strip()
-            slug = row.find_element(By.CSS_SELECTOR, "td.custom__table-heading__title > a").get_attribute("href").strip()
-            keys = [el.text for el in row.find_elements(By.CSS_SELECTOR, "td.product-catalogue__keys .product-catalogue__key")]
-            
-            course_list.append({
-                "course_id": course_id,
-                "course_name": course_name,
-                "course_url": slug,
-                "keys": keys
-            })
-        except Exception:
-            continue
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+CATALOG_URL = "https://www.shl.com/solutions/products/product-catalog/"
+OUTPUT_FILE = "shl_courses2.json"
+# Rows per catalog listing page, used when pagination links do not reveal it
+PAGE_SIZE = 12
+HTTP_WORKERS = 8
+# Requests per second allowed against the catalog host
+RATE_LIMIT = 5.0
+REQUEST_TIMEOUT = (3.05, 15)
+
+# lxml is much faster than the stdlib parser but optional
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+
+# Streams scraped rows to an append-only JSONL file page by page. After each
+# page the checkpoint records how many pages are complete and how long the
+# JSONL file was at that point, so a restarted run truncates any torn page
+# and resumes after the last completed one.
+class CatalogWriter:
+    def __init__(self, output=OUTPUT_FILE):
+        self.output = output
+        self.records_path = f"{output}.partial.jsonl"
+        self.checkpoint_path = f"{output}.checkpoint.json"
+        self.pages_done = 0
+        self.records = 0
+
+        offset = 0
+        if os.path.exists(self.checkpoint_path) and os.path.exists(self.records_path):
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+            self.pages_done = checkpoint["pages_done"]
+            self.records = checkpoint["records"]
+            offset = checkpoint["offset"]
+
+        self.file = open(self.records_path, "ab")
+        self.file.truncate(offset)
+
+    # Append one completed page and move the checkpoint past it
+    def write_page(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(row, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pages_done += 1
+        self.records += len(rows)
+
+        checkpoint = {"pages_done": self.pages_done, "records": self.records, "offset": self.file.tell()}
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    # Stream the JSONL rows into the final JSON file, dropping repeated
+    # courses, then atomically replace the output and clear the checkpoint
+    def compact(self):
+        self.file.close()
+        tmp_path = f"{self.output}.tmp"
+        seen = set()
+        count = 0
+        with open(self.records_path, "r", encoding="utf-8") as records, \
+                open(tmp_path, "w", encoding="utf-8") as out:
+            out.write("[")
+            for line in records:
+                course = json.loads(line)
+                key = course["course_id"] or course["course_url"]
+                if key in seen:
+                    continue
+                seen.add(key)
+                # Same layout as json.dump(course_list, indent=4)
+                out.write(",\n" if count else "\n")
+                out.write(textwrap.indent(json.dumps(course, ensure_ascii=False, indent=4), "    "))
+                count += 1
+            out.write("\n]" if count else "]")
+        os.replace(tmp_path, self.output)
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        os.remove(self.records_path)
+        return count
+
+
+# Original browser-driven scraper: clicks through every page in headless Chrome
+def scrape_with_selenium(writer, catalog_url=CATALOG_URL):
+    from selenium import webdriver
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import NoSuchElementException
+
+    # Initialize Chrome WebDriver
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")  # Optional: remove if you want browser to be visible
+    driver = webdriver.Chrome(options=options)
 
-    # Check for next button
     try:
-        next_btn = driver.find_element(By.CSS_SELECTOR, "li.pagination__item.-arrow.-next > a")
-        if "disabled" in next_btn.get_attribute("class"):
-            break
-        driver.execute_script("arguments[0].click();", next_btn)
-        time.sleep(2)
-    except:
-        break
-
-# Step 9: Save to JSON
-with open("shl_courses2.json", "w", encoding="utf-8") as f:
-    json.dump(course_list, f, ensure_ascii=False, indent=4)
-
-driver.quit()
-print("✅ Scraping completed. Data saved in shl_courses2.json.")
+        # Step 1: Open the URL
+        driver.get(catalog_url)
+        wait = WebDriverWait(driver, 15)
+
+        # Step 2: Click on the Search Button
+        search_button_selector = "#Form_FilteringFormJobTitle_action_doFilteringForm > span"
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, search_button_selector))).click()
+
+        # Step 3 to 8: Scrape table and paginate, skipping pages a previous run completed
+        page = 0
+        while True:
+            table = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "table")))
+
+            if page >= writer.pages_done:
+                # Get all rows
+                rows = driver.find_elements(By.CSS_SELECTOR, "table > tbody > tr")
+                course_list = []
+
+                for row in rows:
+                    try:
+                        course_id = row.get_attribute("data-course-id")
+                        course_name = row.find_element(By.CSS_SELECTOR, "td.custom__table-heading__title > a").text.strip()
+                        slug = row.find_element(By.CSS_SELECTOR, "td.custom__table-heading__title > a").get_attribute("href").strip()
+                        keys = [el.text for el in row.find_elements(By.CSS_SELECTOR, "td.product-catalogue__keys .product-catalogue__key")]
+
+                        course_list.append({
+                            "course_id": course_id,
+                            "course_name": course_name,
+                            "course_url": slug,
+                            "keys": keys
+                        })
+                    except NoSuchElementException:
+                        continue  # Header rows have no course link
+
+                writer.write_page(course_list)
+            page += 1
+
+            # Check for next button; only its absence ends the run, other
+            # errors propagate and the checkpoint lets a rerun resume here
+            try:
+                next_btn = driver.find_element(By.CSS_SELECTOR, "li.pagination__item.-arrow.-next > a")
+            except NoSuchElementException:
+                break
+            if "disabled" in (next_btn.get_attribute("class") or ""):
+                break
+            driver.execute_script("arguments[0].click();", next_btn)
+            wait.until(EC.staleness_of(table))
+    finally:
+        driver.quit()
+
+
+# Spaces out requests to one host so that at most `rate` start per second
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Body of a response for the HTML parser. Without a declared charset, raw
+# bytes let the parser detect the encoding instead of assuming ISO-8859-1.
+def response_html(response):
+    if "charset" in response.headers.get("Content-Type", "").lower():
+        return response.text
+    return response.content
+
+
+# Parse the course rows of one catalog listing page
+def parse_catalog_rows(html, page_url):
+    soup = BeautifulSoup(html, HTML_PARSER)
+    course_list = []
+    for row in soup.select("table > tbody > tr"):
+        link = row.select_one("td.custom__table-heading__title > a")
+        if link is None or not link.get("href"):
+            continue  # Header rows have no course link
+        course_list.append({
+            "course_id": row.get("data-course-id"),
+            "course_name": link.get_text().strip(),
+            "course_url": urljoin(page_url, link["href"].strip()),
+            "keys": [el.get_text().strip() for el in row.select("td.product-catalogue__keys .product-catalogue__key")]
+        })
+    return course_list, soup
+
+
+# URLs of every listing page, derived from the ?start=&type= pagination links
+def listing_page_urls(first_page_soup, catalog_url, page_size=PAGE_SIZE):
+    last_start = {}
+    for link in first_page_soup.select("li.pagination__item a[href]"):
+        params = parse_qs(urlparse(link["href"]).query)
+        if "start" not in params:
+            continue
+        page_type = params.get("type", [None])[0]
+        last_start[page_type] = max(last_start.get(page_type, 0), int(params["start"][0]))
+
+    page_urls = []
+    for page_type, max_start in sorted(last_start.items(), key=lambda entry: str(entry[0])):
+        for start in range(0, max_start + 1, page_size):
+            params = {"start": start}
+            if page_type is not None:
+                params["type"] = page_type
+            page_urls.append(f"{catalog_url}?{urlencode(params)}")
+    return page_urls
+
+
+# Fetch all catalog listing pages over HTTP with a bounded worker pool and
+# stream them to the writer in page order, resuming after completed pages
+def scrape_with_http(writer, catalog_url=CATALOG_URL, workers=HTTP_WORKERS, rate=RATE_LIMIT, page_size=PAGE_SIZE):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    limiter = RateLimiter(rate)
+
+    def fetch_page(page_url):
+        limiter.wait()
+        response = session.get(page_url, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return parse_catalog_rows(response_html(response), page_url)[0]
+
+    limiter.wait()
+    response = session.get(catalog_url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    first_rows, first_soup = parse_catalog_rows(response_html(response), catalog_url)
+
+    page_urls = listing_page_urls(first_soup, catalog_url, page_size)
+    if not page_urls:
+        if writer.pages_done == 0:
+            writer.write_page(first_rows)
+        return
+
+    # Pages are fetched in windows so memory stays flat however many pages there are
+    window = workers * 4
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start in range(writer.pages_done, len(page_urls), window):
+            # map keeps page order, so the output order matches the Selenium loop
+            for rows in executor.map(fetch_page, page_urls[start:start + window]):
+                writer.write_page(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape the SHL product catalog")
+    parser.add_argument("--mode", choices=("http", "selenium"), default="http",
+                        help="fetch listing pages directly over HTTP or drive headless Chrome")
+    parser.add_argument("--url", default=CATALOG_URL, help="catalog listing URL")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="JSON file to write")
+    parser.add_argument("--workers", type=int, default=HTTP_WORKERS, help="concurrent page fetches (http mode)")
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="max requests per second (http mode)")
+    args = parser.parse_args()
+
+    writer = CatalogWriter(args.output)
+    if writer.pages_done:
+        print(f"Resuming after page {writer.pages_done} ({writer.records} rows already saved).")
+
+    started = time.perf_counter()
+    if args.mode == "selenium":
+        scrape_with_selenium(writer, args.url)
+    else:
+        scrape_with_http(writer, args.url, workers=args.workers, rate=args.rate)
+    elapsed = time.perf_counter() - started
+
+    # Save to JSON
+    count = writer.compact()
+
+    print(f"✅ Scraping completed. {count} courses saved in {args.output} "
+          f"({args.mode} mode, {elapsed:.1f}s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import unicodedata
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from condense import WORD_RE
+from index_file import RecordArray, pack_records
+
+# Suggestions returned when a request does not ask for a number
+SUGGEST_LIMIT = 10
+# Name tokens are indexed on their first bytes only, which bounds the width
+# of the token array; longer typed tokens are cut the same way
+MAX_TOKEN_BYTES = 24
+
+
+# Lower-cased text with accents removed, so "Évaluation" is found by "eval"
+def normalize(text):
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def name_tokens(text):
+    return [token.encode("utf-8")[:MAX_TOKEN_BYTES] for token in WORD_RE.findall(normalize(text))]
+
+
+# Priority of each distinct assessment name. The catalog carries no usage
+# data, so names listed under more catalog entries (counting collapsed
+# variants) rank first, then those covering more assessment types (at most
+# nine key codes, hence the tenths).
+def name_priorities(catalog_data):
+    listings = Counter()
+    keys = defaultdict(set)
+    for item in catalog_data:
+        listings[item["name"]] += 1 + len(item.get("variants") or ())
+        keys[item["name"]].update(item.get("keys") or ())
+    return {name: listings[name] + len(keys[name]) / 10 for name in listings}
+
+
+# Prefix index over the tokens of assessment names for typeahead. Distinct
+# names are numbered in priority order and every (token, name) pair is kept
+# in one sorted byte-string array, so a typed prefix is a binary search and
+# the matching numbers, smallest first, are the best suggestions.
+class SuggestIndex:
+    def __init__(self, catalog_data):
+        priorities = name_priorities(catalog_data)
+        urls = {}
+        for item in catalog_data:
+            urls.setdefault(item["name"], item["url"])
+        names = sorted(priorities, key=lambda name: (-priorities[name], name))
+        entries = sorted(
+            (token, rank) for rank, name in enumerate(names) for token in set(name_tokens(name))
+        )
+        self.tokens = np.array([token for token, _ in entries], dtype=f"S{MAX_TOKEN_BYTES}")
+        self.ranks = np.array([rank for _, rank in entries], dtype=np.int32)
+        self.names = [{"name": name, "url": urls[name], "score": priorities[name]} for name in names]
+
+    def arrays(self):
+        names, name_offsets = pack_records(self.names)
+        return {
+            "suggest_tokens": self.tokens,
+            "suggest_ranks": self.ranks,
+            "suggest_names": names,
+            "suggest_name_offsets": name_offsets
+        }
+
+    # Index over the output of arrays(), without decoding any name
+    @classmethod
+    def from_arrays(cls, arrays):
+        index = cls.__new__(cls)
+        index.tokens = arrays["suggest_tokens"]
+        index.ranks = arrays["suggest_ranks"]
+        index.names = RecordArray(arrays["suggest_names"], arrays["suggest_name_offsets"])
+        return index
+
+    # Sorted distinct name numbers in matches. A bitmap over the names is
+    # cheaper than sorting a long run of matches, as for a one-letter prefix.
+    def _distinct(self, matches):
+        if len(matches) * 16 < len(self.names):
+            return np.unique(matches)
+        seen = np.zeros(len(self.names), dtype=bool)
+        seen[matches] = True
+        return np.flatnonzero(seen)
+
+    # Best names with a token starting with each typed word, as
+    # {"name", "url", "score"} dicts
+    def suggest(self, prefix, limit=SUGGEST_LIMIT):
+        # No UTF-8 byte is 0xff, so token + 0xff bounds every token with the prefix
+        ranges = [
+            np.searchsorted(self.tokens, np.array([token, token + b"\xff"]))
+            for token in set(name_tokens(prefix))
+        ]
+        if not ranges:
+            return []
+        # Start from the most selective word; the others filter its matches
+        ranges.sort(key=lambda bounds: bounds[1] - bounds[0])
+        start, end = ranges[0]
+        ranks = self._distinct(self.ranks[start:end])
+        for start, end in ranges[1:]:
+            if not len(ranks):
+                break
+            matched = np.zeros(len(self.names), dtype=bool)
+            matched[self.ranks[start:end]] = True
+            ranks = ranks[matched[ranks]]
+        return [self.names[rank] for rank in ranks[:limit]]
@@ -0,0 +1,58 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Local stand-in for the sites the fetchers talk to. Tests register pages
+# as server.pages[path] = (status, content type, body bytes); every request
+# path is recorded in server.requests, server.delay adds latency in seconds
+# to each response, and server.peak_in_flight is the most requests the
+# server was handling at once.
+@pytest.fixture
+def http_server():
+    pages = {}
+    requests = []
+    lock = threading.Lock()
+    in_flight = 0
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            nonlocal in_flight
+            requests.append(self.path)
+            with lock:
+                in_flight += 1
+                server.peak_in_flight = max(server.peak_in_flight, in_flight)
+            try:
+                if server.delay:
+                    time.sleep(server.delay)
+            finally:
+                with lock:
+                    in_flight -= 1
+            status, content_type, body = pages.get(self.path, (404, "text/plain", b"not found"))
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.pages = pages
+    server.requests = requests
+    server.delay = 0
+    server.peak_in_flight = 0
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
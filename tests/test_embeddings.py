@@ -0,0 +1,31 @@
+import os
+import threading
+
+from embeddings import get_embedder, load_or_build_store
+
+TEXTS = [f"assessment {number} of verbal and numerical reasoning" for number in range(2000)]
+
+
+# Threads building the same version at once used to share one temp file
+# and could crash the process with SIGBUS
+def test_concurrent_builds_of_one_version(tmp_path):
+    stores = []
+    threads = [
+        threading.Thread(target=lambda: stores.append(load_or_build_store("v1", TEXTS, base_dir=str(tmp_path))))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stores) == 4
+    assert all(store.matrix.shape == stores[0].matrix.shape for store in stores)
+    version_dir = tmp_path / get_embedder().name / "v1"
+    assert sorted(os.listdir(version_dir)) == ["hashes.json", "vectors.npy"]
+
+
+def test_build_reuses_rows_of_previous_version(tmp_path):
+    first = load_or_build_store("v1", TEXTS, base_dir=str(tmp_path))
+    second = load_or_build_store("v2", TEXTS[::-1], base_dir=str(tmp_path))
+    assert (second.matrix[0] == first.matrix[-1]).all()
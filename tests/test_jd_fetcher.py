@@ -0,0 +1,83 @@
+import asyncio
+import threading
+
+import pytest
+
+from jd_fetcher import JobDescriptionFetcher
+
+POSTING = b"""<html><body>
+<nav>Home | Jobs | Sign in</nav>
+<main><h1>Java Developer</h1><p>Build services in Java and work with the team.</p></main>
+<footer>Privacy policy</footer>
+</body></html>"""
+
+
+def test_fetch_extracts_posting_without_chrome(http_server):
+    http_server.pages["/job"] = (200, "text/html; charset=utf-8", POSTING)
+    fetcher = JobDescriptionFetcher()
+    try:
+        text = asyncio.run(fetcher.fetch(http_server.url + "/job"))
+    finally:
+        fetcher.close()
+    assert "Build services in Java" in text
+    assert "Sign in" not in text and "Privacy policy" not in text
+
+
+def test_fetch_caches_and_shares_in_flight_downloads(http_server):
+    http_server.pages["/job"] = (200, "text/html", POSTING)
+    fetcher = JobDescriptionFetcher()
+
+    async def fetch_many():
+        return await asyncio.gather(*(fetcher.fetch(http_server.url + "/job") for _ in range(8)))
+
+    try:
+        texts = asyncio.run(fetch_many())
+        assert fetcher.fetch_sync(http_server.url + "/job") == texts[0]
+    finally:
+        fetcher.close()
+    assert len(set(texts)) == 1
+    assert http_server.requests == ["/job"]
+    assert fetcher.stats()["in_flight"] == 0
+
+
+def test_download_reads_at_most_max_bytes(http_server):
+    http_server.pages["/long"] = (200, "text/plain", b"x" * 100000)
+    fetcher = JobDescriptionFetcher(max_bytes=1000)
+    try:
+        assert len(fetcher.download(http_server.url + "/long")) == 1000
+    finally:
+        fetcher.close()
+
+
+def test_http_errors_count_as_failures(http_server):
+    fetcher = JobDescriptionFetcher()
+    try:
+        with pytest.raises(Exception):
+            asyncio.run(fetcher.fetch(http_server.url + "/missing"))
+    finally:
+        fetcher.close()
+    assert fetcher.stats()["failures"] == 1
+    assert fetcher.stats()["in_flight"] == 0
+
+
+# A URL that fails before the future is even awaited used to run the
+# single-flight cleanup under the lock it takes, hanging the event loop.
+# The loop runs on its own thread so a hang fails the test instead.
+def test_fast_failing_urls_do_not_hang():
+    fetcher = JobDescriptionFetcher()
+    errors = []
+
+    async def fetch_all():
+        for attempt in range(300):
+            try:
+                await fetcher.fetch(f"notaurl-{attempt}")
+            except Exception as e:
+                errors.append(e)
+
+    loop_thread = threading.Thread(target=asyncio.run, args=(fetch_all(),), daemon=True)
+    loop_thread.start()
+    loop_thread.join(timeout=30)
+    fetcher.close()
+    assert not loop_thread.is_alive()
+    assert len(errors) == 300
+    assert fetcher.stats()["in_flight"] == 0
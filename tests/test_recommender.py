@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+
+import pytest
+
+import recommender
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOG = "catalog.json"
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    # Index files go to ./index_cache, so each test gets its own directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(recommender, "_indexes", {})
+    monkeypatch.setattr(recommender, "_catalog_mtimes", {})
+    with open(os.path.join(ROOT, "shl_courses2.json"), "r", encoding="utf-8") as f:
+        courses = json.load(f)[:200]
+    write_catalog(courses)
+    yield courses
+    recommender.result_cache.clear()
+
+
+def write_catalog(courses):
+    with open(CATALOG, "w", encoding="utf-8") as f:
+        json.dump(courses, f)
+
+
+# Forget every loaded index, as a new process would
+def restart(monkeypatch):
+    monkeypatch.setattr(recommender, "_indexes", {})
+    recommender.result_cache.clear()
+    return recommender.get_recommender_index(CATALOG)
+
+
+def wait_for_refits():
+    for thread in threading.enumerate():
+        if thread.name == "index-refit":
+            thread.join()
+
+
+def top_names(index, query, k=3):
+    results = recommender.get_recommendations(query, index.catalog_data, k, index=index)
+    return [(rec["name"], rec["score"]) for rec in results]
+
+
+def scores_by_name(index, query):
+    return {name: round(score, 9) for name, score in top_names(index, query, 20)}
+
+
+def course(course_id, name, keys):
+    return {
+        "course_id": course_id,
+        "course_name": name,
+        "course_url": f"https://www.shl.com/solutions/products/product-catalog/view/{course_id}/",
+        "keys": keys
+    }
+
+
+# A course with terms the fitted vocabulary lacks is found right after the
+# reload and after a restart maps the saved index
+def test_reload_with_new_terms_then_restart(catalog, monkeypatch):
+    recommender.get_recommender_index(CATALOG)
+    write_catalog(catalog + [course("9001", "Quantum Kotlin Developer Test", ["K"])])
+
+    index, reloaded = recommender.reload_catalog(CATALOG)
+    assert reloaded
+    name, score = top_names(index, "kotlin quantum")[0]
+    assert name == "Quantum Kotlin Developer Test" and score > 0
+
+    wait_for_refits()
+    name, score = top_names(restart(monkeypatch), "kotlin quantum")[0]
+    assert name == "Quantum Kotlin Developer Test" and score > 0
+
+
+# An incremental update is only served until the background refit replaces
+# it; the saved index matches a fit of the same catalog from scratch
+def test_reload_saves_full_refit(catalog, monkeypatch, tmp_path):
+    recommender.get_recommender_index(CATALOG)
+    # Only known terms, so the reload takes the incremental path
+    name = catalog[0]["course_name"] + " " + catalog[1]["course_name"]
+    updated = catalog + [course("9002", name, catalog[0]["keys"])]
+    write_catalog(updated)
+
+    recommender.reload_catalog(CATALOG)
+    wait_for_refits()
+    served = recommender.loaded_index(CATALOG)
+    restarted = restart(monkeypatch)
+
+    monkeypatch.chdir(tmp_path / "..")
+    catalog_data, version = recommender.load_catalog(str(tmp_path / CATALOG), fallback=False)
+    fresh = recommender.RecommenderIndex.build(catalog_data, version)
+    query = catalog[0]["course_name"]
+    assert scores_by_name(served, query) == scores_by_name(fresh, query)
+    assert scores_by_name(restarted, query) == scores_by_name(fresh, query)
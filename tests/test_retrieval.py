@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from retrieval import InvertedIndex, select_top_k
+
+
+# Random L2-normalised TF-IDF-like matrix, with a few common terms so the
+# pruned phase of the search is reached
+def random_matrix(rng, n_docs, n_terms, density):
+    matrix = sp.random(n_docs, n_terms, density=density, format="csr", random_state=rng)
+    common = sp.random(n_docs, 4, density=0.6, format="csr", random_state=rng) * 0.3
+    matrix = sp.hstack([common, matrix], format="csr")
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    norms[norms == 0] = 1.0
+    return sp.csr_matrix(matrix.multiply(1 / norms[:, None]))
+
+
+# Top-k by scoring every document, as the search should return it
+def brute_force(matrix, query, k, allowed=None):
+    scores = np.asarray((matrix @ query.T).todense()).ravel()
+    candidates = np.flatnonzero(scores > 0)
+    if allowed is not None:
+        candidates = candidates[allowed[candidates]]
+    return select_top_k(candidates, scores[candidates], k)
+
+
+@pytest.mark.parametrize("filtered", [False, True])
+def test_search_matches_brute_force(filtered):
+    rng = np.random.default_rng(7)
+    for case in range(150):
+        n_docs = int(rng.integers(1, 400))
+        matrix = random_matrix(rng, n_docs, int(rng.integers(5, 60)), float(rng.uniform(0.02, 0.3)))
+        index = InvertedIndex(matrix)
+        query = sp.random(1, matrix.shape[1], density=float(rng.uniform(0.05, 0.5)), format="csr", random_state=rng)
+        k = int(rng.integers(1, 30))
+        allowed = rng.random(n_docs) < 0.4 if filtered else None
+
+        doc_ids, scores = index.search(query, k, allowed=allowed)
+        expected_ids, expected_scores = brute_force(matrix, query, k, allowed)
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-9, atol=1e-12, err_msg=f"case {case}")
+        assert doc_ids.tolist() == expected_ids.tolist(), f"case {case}"
+
+
+@pytest.mark.parametrize("k", [0, -1])
+def test_search_with_no_results_requested(k):
+    rng = np.random.default_rng(0)
+    matrix = random_matrix(rng, 50, 20, 0.2)
+    doc_ids, scores = InvertedIndex(matrix).search(matrix[:1], k)
+    assert len(doc_ids) == 0 and len(scores) == 0
@@ -0,0 +1,115 @@
+import json
+import os
+from urllib.parse import urlparse
+
+import pytest
+
+from scrape2 import CatalogWriter, listing_page_urls, parse_catalog_rows, scrape_with_http
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "catalog_pages")
+CATALOG_PATH = "/solutions/products/product-catalog/"
+# Saved listing pages by (type, start), in the order the scraper writes them.
+# Their rows are the first entries of shl_courses2.json in the same order.
+LISTING_PAGES = [("1", 0), ("1", 12), ("1", 24), ("2", 0), ("2", 12)]
+
+
+def read_page(name):
+    with open(os.path.join(PAGES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def listing_path(page_type, start):
+    return f"{CATALOG_PATH}?start={start}&type={page_type}"
+
+
+# Serve the saved catalog: the landing page and every listing page
+def serve_catalog(server):
+    server.pages[CATALOG_PATH] = (200, "text/html; charset=utf-8", read_page("catalog.html"))
+    for page_type, start in LISTING_PAGES:
+        body = read_page(f"start-{start}-type-{page_type}.html")
+        server.pages[listing_path(page_type, start)] = (200, "text/html; charset=utf-8", body)
+    return server.url + CATALOG_PATH
+
+
+# The shl_courses2.json records the saved pages were made from, with URLs
+# pointing at the stand-in server
+def expected_courses(server):
+    with open(os.path.join(ROOT, "shl_courses2.json"), "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    courses = catalog[:46]
+    return [{**course, "course_url": server.url + urlparse(course["course_url"]).path} for course in courses]
+
+
+def scrape(server, output, **kwargs):
+    writer = CatalogWriter(str(output))
+    scrape_with_http(writer, server.url + CATALOG_PATH, rate=0, **kwargs)
+    return writer
+
+
+def test_parsed_rows_match_catalog_schema(http_server):
+    with open(os.path.join(ROOT, "shl_courses2.json"), "r", encoding="utf-8") as f:
+        reference = json.load(f)[0]
+    page_url = http_server.url + listing_path("1", 0)
+    rows, _ = parse_catalog_rows(read_page("start-0-type-1.html"), page_url)
+    assert rows == expected_courses(http_server)[:12]
+    for row in rows:
+        assert list(row) == list(reference)
+        assert row["course_id"] is None or isinstance(row["course_id"], str)
+        assert all(isinstance(key, str) for key in row["keys"])
+
+
+def test_listing_page_urls_cover_every_page():
+    _, soup = parse_catalog_rows(read_page("catalog.html"), "http://catalog.test" + CATALOG_PATH)
+    urls = listing_page_urls(soup, "http://catalog.test" + CATALOG_PATH)
+    assert urls == ["http://catalog.test" + listing_path(page_type, start) for page_type, start in LISTING_PAGES]
+
+
+def test_http_scrape_writes_catalog_json(http_server, tmp_path):
+    serve_catalog(http_server)
+    output = tmp_path / "courses.json"
+    writer = scrape(http_server, output)
+    assert writer.compact() == 46
+    with open(output, "r", encoding="utf-8") as f:
+        assert json.load(f) == expected_courses(http_server)
+    assert not os.path.exists(writer.checkpoint_path)
+    assert not os.path.exists(writer.records_path)
+
+
+# A failed page stops the run after the pages before it are checkpointed;
+# the rerun fetches only the landing page and the pages still missing
+def test_http_scrape_resumes_from_checkpoint(http_server, tmp_path):
+    serve_catalog(http_server)
+    failing = listing_path("2", 0)
+    saved = http_server.pages[failing]
+    http_server.pages[failing] = (500, "text/plain", b"error")
+    output = tmp_path / "courses.json"
+    with pytest.raises(Exception):
+        scrape(http_server, output)
+
+    writer = CatalogWriter(str(output))
+    assert writer.pages_done == 3
+    assert writer.records == 28
+    writer.file.close()
+    # A page torn by the interruption is dropped on resume
+    with open(writer.records_path, "ab") as f:
+        f.write(b'{"course_id": "torn", "cour')
+
+    http_server.pages[failing] = saved
+    http_server.requests.clear()
+    writer = scrape(http_server, output)
+    assert http_server.requests[0] == CATALOG_PATH
+    assert sorted(http_server.requests[1:]) == [listing_path("2", 0), listing_path("2", 12)]
+    assert writer.compact() == 46
+    with open(output, "r", encoding="utf-8") as f:
+        assert json.load(f) == expected_courses(http_server)
+
+
+# With every response delayed, listing pages are fetched side by side
+# rather than one after another as in the Selenium loop
+def test_http_scrape_fetches_pages_concurrently(http_server, tmp_path):
+    serve_catalog(http_server)
+    http_server.delay = 0.2
+    writer = scrape(http_server, tmp_path / "courses.json", workers=8)
+    assert writer.compact() == 46
+    assert http_server.peak_in_flight >= 2